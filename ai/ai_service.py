@@ -3,12 +3,35 @@ AI Service Module
 Main AI service for LLM integration, summarization, and data extraction.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterator, AsyncIterator
 from loguru import logger
+import asyncio
+import numpy as np
 from .summarizer import Summarizer
+from .llm_cache import LLMCache, DEFAULT_CACHE_PATH
 from .intent_engine import IntentEngine
 
 
+# Static instructions first so the shared prefix can be reused by prompt caching
+COMPARISON_PREFIX = """Compare these products and provide a detailed analysis.
+
+Provide:
+1. Best value recommendation
+2. Price comparison
+3. Feature differences
+4. Overall recommendation
+
+"""
+
+PRODUCT_TEMPLATE = (
+    "Product from %s:\n"
+    "Title: %s\n"
+    "Price: %s\n"
+    "Rating: %s\n"
+    "Availability: %s"
+)
+
+
 class AIService:
     """
     Main AI service integrating LLM capabilities for scraping.
@@ -18,7 +41,8 @@ class AIService:
         self,
         model_type: str = "ollama",
         model_name: str = "llama3",
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        cache_path: Optional[str] = DEFAULT_CACHE_PATH
     ):
         """
         Initialize AI service.
@@ -27,12 +51,15 @@ class AIService:
             model_type: "ollama", "openai", "mistral", etc.
             model_name: Model name/identifier
             api_key: API key for cloud-based models
+            cache_path: SQLite file for persistent LLM response cache, created on
+                first use (None for in-memory)
         """
         self.model_type = model_type
         self.model_name = model_name
         self.api_key = api_key
         
-        self.summarizer = Summarizer(model_type, model_name, api_key)
+        self.cache = LLMCache(path=cache_path)
+        self.summarizer = Summarizer(model_type, model_name, api_key, cache=self.cache)
         self.intent_engine = IntentEngine(model_type, model_name, api_key)
     
     def summarize_content(self, content: str, max_length: int = 500) -> str:
@@ -48,6 +75,58 @@ class AIService:
         """
         return self.summarizer.summarize(content, max_length)
     
+    def summarize_batch(self, contents: List[str], max_length: int = 500) -> List[str]:
+        """
+        Summarize many contents using one batched LLM call.
+        
+        Args:
+            contents: Contents to summarize
+            max_length: Maximum summary length
+            
+        Returns:
+            List of summary strings, in input order
+        """
+        return self.summarizer.summarize_batch(contents, max_length)
+    
+    async def asummarize_content(self, content: str, max_length: int = 500) -> str:
+        """
+        Summarize content using LLM without blocking the event loop.
+        
+        Args:
+            content: Content to summarize
+            max_length: Maximum summary length
+            
+        Returns:
+            Summary string
+        """
+        return await self.summarizer.asummarize(content, max_length)
+    
+    def stream_summarize_content(self, content: str, max_length: int = 500) -> Iterator[str]:
+        """
+        Summarize content using LLM, yielding text as it is generated.
+        
+        Args:
+            content: Content to summarize
+            max_length: Maximum summary length
+            
+        Returns:
+            Iterator of summary text chunks
+        """
+        return self.summarizer.stream_summarize(content, max_length)
+    
+    def astream_summarize_content(self, content: str, max_length: int = 500) -> AsyncIterator[str]:
+        """
+        Summarize content using LLM, asynchronously yielding text as it is generated.
+        
+        Args:
+            content: Content to summarize
+            max_length: Maximum summary length
+            
+        Returns:
+            Async iterator of summary text chunks
+        """
+        return self.summarizer.asummarize_stream(content, max_length)
+    
     def extract_data(self, content: str, schema: Dict[str, Any]) -> Dict[str, Any]:
         """
         Extract structured data from content using AI.
@@ -83,27 +162,65 @@ class AIService:
         Returns:
             Comparison report text
         """
-        # Format products for LLM
-        products_text = "\n\n".join([
-            f"Product from {p.get('source', 'unknown')}:\n"
-            f"Title: {p.get('title', 'N/A')}\n"
-            f"Price: {p.get('price', 'N/A')}\n"
-            f"Rating: {p.get('rating', 'N/A')}\n"
-            f"Availability: {p.get('availability', 'N/A')}"
-            for p in products
-        ])
+        prompt = COMPARISON_PREFIX + self._format_products(products)
+        scope = self.summarizer._cache_scope("compare", "")
+        # Exact matches only: similar listings can differ in price
+        cached = self.cache.get(self.summarizer.cache_model, scope, prompt)
+        if cached is not None:
+            return cached
         
-        prompt = f"""Compare these products and provide a detailed analysis:
+        model = self.summarizer._get_model()
         
-{products_text}
-
-Provide:
-1. Best value recommendation
-2. Price comparison
-3. Feature differences
-4. Overall recommendation"""
+        try:
+            report = self.summarizer._response_text(model.invoke(prompt))
+            self.cache.set(self.summarizer.cache_model, scope, prompt, report)
+            return report
+        except Exception as e:
+            logger.error(f"Comparison report failed: {e}")
+            return f"Error generating comparison report: {e}"
+    
+    async def agenerate_comparison_report(self, products: List[Dict[str, Any]]) -> str:
+        """
+        Generate AI-powered comparison report without blocking the event loop.
+        
+        Args:
+            products: List of product dicts to compare
+            
+        Returns:
+            Comparison report text
+        """
+        model = self.summarizer._get_model()
+        if not hasattr(model, 'ainvoke'):
+            return await asyncio.to_thread(self.generate_comparison_report, products)
         
-        return self.summarizer.summarize(products_text, max_length=1000)
+        prompt = COMPARISON_PREFIX + self._format_products(products)
+        scope = self.summarizer._cache_scope("compare", "")
+        # The cache does blocking SQLite I/O, so it runs off the event loop
+        cached = await asyncio.to_thread(self.cache.get, self.summarizer.cache_model, scope, prompt)
+        if cached is not None:
+            return cached
+        
+        try:
+            report = self.summarizer._response_text(await model.ainvoke(prompt))
+            await asyncio.to_thread(self.cache.set, self.summarizer.cache_model, scope, prompt, report)
+            return report
+        except Exception as e:
+            logger.error(f"Comparison report failed: {e}")
+            return f"Error generating comparison report: {e}"
+    
+    @staticmethod
+    def _format_products(products: List[Dict[str, Any]]) -> str:
+        """Format products for LLM."""
+        return "\n\n".join(
+            PRODUCT_TEMPLATE % (
+                p.get("source", "unknown"),
+                p.get("title", "N/A"),
+                p.get("price", "N/A"),
+                p.get("rating", "N/A"),
+                p.get("availability", "N/A")
+            )
+            for p in products
+        )
     
     def detect_anomalies(self, price_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -118,32 +235,33 @@ Provide:
         if len(price_history) < 3:
             return []
         
-        # Calculate price changes
-        anomalies = []
-        for i in range(1, len(price_history)):
-            prev_price = price_history[i-1].get("price", 0)
-            curr_price = price_history[i].get("price", 0)
-            
-            if prev_price > 0:
-                change_percent = ((curr_price - prev_price) / prev_price) * 100
-                
-                # Detect significant changes (>20% drop or >30% increase)
-                if change_percent < -20:
-                    anomalies.append({
-                        "type": "price_drop",
-                        "change_percent": change_percent,
-                        "previous_price": prev_price,
-                        "current_price": curr_price,
-                        "date": price_history[i].get("date")
-                    })
-                elif change_percent > 30:
-                    anomalies.append({
-                        "type": "price_spike",
-                        "change_percent": change_percent,
-                        "previous_price": prev_price,
-                        "current_price": curr_price,
-                        "date": price_history[i].get("date")
-                    })
+        # Calculate price changes in one vectorized pass
+        prices = np.fromiter(
+            (p.get("price") or 0 for p in price_history),
+            dtype=np.float64,
+            count=len(price_history)
+        )
+        prev_prices = prices[:-1]
+        curr_prices = prices[1:]
+        valid = prev_prices > 0
+        change_percent = np.zeros_like(prev_prices)
+        np.divide(curr_prices - prev_prices, prev_prices, out=change_percent, where=valid)
+        change_percent *= 100
+        
+        # Detect significant changes (>20% drop or >30% increase)
+        drops = valid & (change_percent < -20)
+        spikes = valid & (change_percent > 30)
+        
+        anomalies = [
+            {
+                "type": "price_drop" if drops[i] else "price_spike",
+                "change_percent": float(change_percent[i]),
+                "previous_price": float(prev_prices[i]),
+                "current_price": float(curr_prices[i]),
+                "date": price_history[i + 1].get("date")
+            }
+            for i in np.flatnonzero(drops | spikes)
+        ]
         
         return anomalies
 
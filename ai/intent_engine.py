@@ -3,9 +3,99 @@ Intent Understanding Engine
 Analyzes user prompts to determine scraping strategy.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+from collections import OrderedDict
+from functools import lru_cache
 from loguru import logger
+from .llm import get_llm, parse_llm_json
 import re
+import threading
+
+
+# Static instructions first so the prompt prefix is identical across calls
+INTENT_PREFIX = """Analyze this user request for web scraping and provide a JSON response:
+{
+    "action": "scrape|compare|track|extract",
+    "method": "auto|requests|cloudscraper|browser",
+    "data_type": "product|article|general",
+    "features": ["list", "of", "features"],
+    "confidence": 0.0-1.0
+}
+Return only valid JSON.
+"""
+
+# Prompts whose final intent is remembered, least recently used evicted first
+INTENT_CACHE_SIZE = 1024
+# Rule-based intents at or above this confidence skip the LLM
+LLM_CONFIDENCE_THRESHOLD = 0.7
+
+# (keywords, field updates, features, confidence delta), applied in order
+_INTENT_RULES = (
+    (("compare", "comparison", "versus", "vs"), {"action": "compare"}, ("multi_scrape",), 0.2),
+    (("track", "monitor", "alert", "price history"), {"action": "track"}, ("scheduler", "price_tracking"), 0.2),
+    (("summarize", "summary", "overview"), {}, ("summarization",), 0.1),
+    (("extract", "get", "find", "show"), {}, ("extraction",), 0.1),
+    (("javascript", "dynamic", "spa", "react"), {"method": "browser"}, (), 0.1),
+    (("fast", "quick", "simple"), {"method": "requests"}, (), 0.1),
+    (("product", "item", "price", "buy"), {"data_type": "product"}, ("product_extraction",), 0.1),
+    (("article", "news", "blog", "text"), {"data_type": "article"}, ("text_extraction",), 0.1),
+)
+
+# keyword -> indices of every rule with a keyword contained in it,
+# so "price history" also fires the rule matched by "price"
+_KEYWORD_RULES = {
+    keyword: frozenset(
+        i for i, (others, _, _, _) in enumerate(_INTENT_RULES)
+        if any(other in keyword for other in others)
+    )
+    for keywords, _, _, _ in _INTENT_RULES
+    for keyword in keywords
+}
+
+try:
+    import ahocorasick
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _keyword in _KEYWORD_RULES:
+        _KEYWORD_AUTOMATON.add_word(_keyword, _keyword)
+    _KEYWORD_AUTOMATON.make_automaton()
+except ImportError:
+    _KEYWORD_AUTOMATON = None
+
+# Zero-width lookahead reports every keyword start, including overlaps
+_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(_KEYWORD_RULES, key=len, reverse=True)) + "))"
+)
+
+
+def _matched_rules(prompt_lower: str) -> frozenset:
+    """Find indices of all intent rules whose keywords occur in the prompt."""
+    if _KEYWORD_AUTOMATON is not None:
+        keywords = {keyword for _, keyword in _KEYWORD_AUTOMATON.iter(prompt_lower)}
+    else:
+        keywords = set(_KEYWORD_RE.findall(prompt_lower))
+    return frozenset().union(*(_KEYWORD_RULES[k] for k in keywords))
+
+
+@lru_cache(maxsize=2048)
+def _rule_based_cached(prompt: str) -> Tuple[Tuple[str, Any], ...]:
+    """Rule-based intent analysis, memoized per prompt as a frozen tuple."""
+    matched = _matched_rules(prompt.lower())
+    
+    intent = {
+        "action": "scrape",
+        "method": "auto",
+        "features": [],
+        "confidence": 0.5
+    }
+    
+    for i, (_, updates, features, confidence) in enumerate(_INTENT_RULES):
+        if i in matched:
+            intent.update(updates)
+            intent["features"].extend(features)
+            intent["confidence"] += confidence
+    
+    intent["features"] = tuple(intent["features"])
+    return tuple(intent.items())
 
 
 class IntentEngine:
@@ -23,31 +113,15 @@ class IntentEngine:
         self.model_name = model_name
         self.api_key = api_key
         self._model = None
+        self._intent_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._intent_cache_lock = threading.Lock()
     
     def _get_model(self):
         """Get or initialize LLM model."""
         if self._model:
             return self._model
         
-        if self.model_type == "ollama":
-            try:
-                from langchain_ollama import OllamaLLM
-                self._model = OllamaLLM(model=self.model_name)
-            except ImportError:
-                logger.error("langchain_ollama not installed")
-                raise
-        elif self.model_type == "openai":
-            try:
-                from langchain_openai import ChatOpenAI
-                if not self.api_key:
-                    raise ValueError("OpenAI API key required")
-                self._model = ChatOpenAI(model=self.model_name, api_key=self.api_key)
-            except ImportError:
-                logger.error("langchain_openai not installed")
-                raise
-        else:
-            raise ValueError(f"Unsupported model type: {self.model_type}")
-        
+        self._model = get_llm(self.model_type, self.model_name, self.api_key)
         return self._model
     
     def analyze_intent(self, user_prompt: str) -> Dict[str, Any]:
@@ -60,85 +134,55 @@ class IntentEngine:
         Returns:
             Intent dict with strategy recommendations
         """
+        with self._intent_cache_lock:
+            cached = self._intent_cache.get(user_prompt)
+            if cached is not None:
+                self._intent_cache.move_to_end(user_prompt)
+        if cached is not None:
+            return {**cached, "features": list(cached.get("features", []))}
+        
         # First, try rule-based analysis
         intent = self._rule_based_analysis(user_prompt)
         
         # Enhance with LLM if needed
-        if intent.get("confidence", 0) < 0.7:
-            intent = self._llm_analysis(user_prompt, intent)
-        
+        if intent.get("confidence", 0) < LLM_CONFIDENCE_THRESHOLD:
+            llm_intent = self._llm_intent(user_prompt)
+            if llm_intent is None:
+                # A fallback during an LLM outage is not remembered, so the
+                # prompt gets the LLM again once it is back
+                return intent
+            intent.update(llm_intent)
+        
+        with self._intent_cache_lock:
+            self._intent_cache[user_prompt] = {**intent, "features": list(intent.get("features", []))}
+            self._intent_cache.move_to_end(user_prompt)
+            if len(self._intent_cache) > INTENT_CACHE_SIZE:
+                self._intent_cache.popitem(last=False)
         return intent
     
     def _rule_based_analysis(self, prompt: str) -> Dict[str, Any]:
         """Rule-based intent analysis."""
-        prompt_lower = prompt.lower()
-        
-        intent = {
-            "action": "scrape",
-            "method": "auto",
-            "features": [],
-            "confidence": 0.5
-        }
-        
-        # Detect action type
-        if any(word in prompt_lower for word in ["compare", "comparison", "versus", "vs"]):
-            intent["action"] = "compare"
-            intent["features"].append("multi_scrape")
-            intent["confidence"] += 0.2
-        
-        if any(word in prompt_lower for word in ["track", "monitor", "alert", "price history"]):
-            intent["action"] = "track"
-            intent["features"].append("scheduler")
-            intent["features"].append("price_tracking")
-            intent["confidence"] += 0.2
-        
-        if any(word in prompt_lower for word in ["summarize", "summary", "overview"]):
-            intent["features"].append("summarization")
-            intent["confidence"] += 0.1
-        
-        if any(word in prompt_lower for word in ["extract", "get", "find", "show"]):
-            intent["features"].append("extraction")
-            intent["confidence"] += 0.1
-        
-        # Detect method preference
-        if any(word in prompt_lower for word in ["javascript", "dynamic", "spa", "react"]):
-            intent["method"] = "browser"
-            intent["confidence"] += 0.1
-        
-        if any(word in prompt_lower for word in ["fast", "quick", "simple"]):
-            intent["method"] = "requests"
-            intent["confidence"] += 0.1
-        
-        # Detect data types
-        if any(word in prompt_lower for word in ["product", "item", "price", "buy"]):
-            intent["data_type"] = "product"
-            intent["features"].append("product_extraction")
-            intent["confidence"] += 0.1
-        
-        if any(word in prompt_lower for word in ["article", "news", "blog", "text"]):
-            intent["data_type"] = "article"
-            intent["features"].append("text_extraction")
-            intent["confidence"] += 0.1
-        
+        intent = dict(_rule_based_cached(prompt))
+        intent["features"] = list(intent["features"])
         return intent
     
     def _llm_analysis(self, prompt: str, base_intent: Dict[str, Any]) -> Dict[str, Any]:
         """Enhance intent analysis using LLM."""
+        llm_intent = self._llm_intent(prompt)
+        if llm_intent is not None:
+            # Merge with base intent
+            base_intent.update(llm_intent)
+        return base_intent
+    
+    def _llm_intent(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """Intent fields suggested by the LLM, or None if the call or parse failed."""
         try:
             model = self._get_model()
             
-            analysis_prompt = f"""Analyze this user request for web scraping and provide a JSON response:
-{{
-    "action": "scrape|compare|track|extract",
-    "method": "auto|requests|cloudscraper|browser",
-    "data_type": "product|article|general",
-    "features": ["list", "of", "features"],
-    "confidence": 0.0-1.0
-}}
-
+            analysis_prompt = INTENT_PREFIX + f"""
 User request: {prompt}
 
-Return only valid JSON:"""
+JSON:"""
             
             if hasattr(model, 'invoke'):
                 response = model.invoke(analysis_prompt)
@@ -151,22 +195,14 @@ Return only valid JSON:"""
             else:
                 response_text = str(model(analysis_prompt))
             
-            # Parse JSON from response
-            response_text = response_text.strip()
-            if response_text.startswith("```"):
-                lines = response_text.split("\n")
-                response_text = "\n".join(lines[1:-1])
-            
-            import json
-            llm_intent = json.loads(response_text)
-            
-            # Merge with base intent
-            base_intent.update(llm_intent)
-            return base_intent
+            llm_intent = parse_llm_json(response_text)
+            if not isinstance(llm_intent, dict):
+                raise ValueError(f"expected a JSON object, got {type(llm_intent).__name__}")
+            return llm_intent
             
         except Exception as e:
             logger.warning(f"LLM intent analysis failed: {e}, using rule-based only")
-            return base_intent
+            return None
     
     def recommend_strategy(self, intent: Dict[str, Any]) -> Dict[str, Any]:
         """
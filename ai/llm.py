@@ -0,0 +1,85 @@
+"""
+LLM Client Registry
+Shares one model client per configuration across AI components.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+from loguru import logger
+import orjson
+import re
+import threading
+
+try:
+    from langchain_ollama import OllamaLLM
+except ImportError:
+    OllamaLLM = None
+
+try:
+    from langchain_openai import ChatOpenAI
+except ImportError:
+    ChatOpenAI = None
+
+
+_MODELS: Dict[Tuple[str, str, Optional[str]], Any] = {}
+_MODELS_LOCK = threading.Lock()
+
+# Markdown code fence anywhere in a response, with optional json tag
+_FENCE_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)```")
+
+
+def _build_model(model_type: str, model_name: str, api_key: Optional[str]) -> Any:
+    """Create a new LLM client."""
+    if model_type == "ollama":
+        if OllamaLLM is None:
+            logger.error("langchain_ollama not installed. Install with: pip install langchain-ollama")
+            raise ImportError("langchain_ollama not installed")
+        return OllamaLLM(model=model_name)
+    elif model_type == "openai":
+        if ChatOpenAI is None:
+            logger.error("langchain_openai not installed. Install with: pip install langchain-openai")
+            raise ImportError("langchain_openai not installed")
+        if not api_key:
+            raise ValueError("OpenAI API key required")
+        return ChatOpenAI(model=model_name, api_key=api_key)
+    else:
+        raise ValueError(f"Unsupported model type: {model_type}")
+
+
+def get_llm(model_type: str, model_name: str, api_key: Optional[str] = None) -> Any:
+    """
+    Get the shared LLM client for a configuration, creating it on first use.
+    
+    Args:
+        model_type: "ollama", "openai", etc.
+        model_name: Model name/identifier
+        api_key: API key for cloud-based models
+        
+    Returns:
+        LLM client instance
+    """
+    key = (model_type, model_name, api_key)
+    model = _MODELS.get(key)
+    if model is None:
+        with _MODELS_LOCK:
+            model = _MODELS.get(key)
+            if model is None:
+                model = _MODELS[key] = _build_model(model_type, model_name, api_key)
+    return model
+
+
+def parse_llm_json(text: str) -> Any:
+    """
+    Parse JSON from an LLM response, unwrapping a markdown code fence if present.
+    
+    Args:
+        text: Raw response text
+        
+    Returns:
+        Parsed JSON value
+        
+    Raises:
+        orjson.JSONDecodeError: If the response is not valid JSON
+    """
+    text = text.strip()
+    match = _FENCE_RE.search(text)
+    return orjson.loads(match.group(1) if match else text)
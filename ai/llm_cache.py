@@ -0,0 +1,314 @@
+"""
+LLM Response Cache
+Exact and semantic caching of LLM responses, in memory, Redis, or on disk.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+from loguru import logger
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+import orjson
+
+
+# Persistent store used by AIService, under the user's cache directory
+DEFAULT_CACHE_PATH = str(
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "web-scraper" / "llm_cache.db"
+)
+# Cached responses expire after a day unless another TTL is given
+DEFAULT_TTL = 86400
+
+
+class LLMCache:
+    """
+    Response cache for LLM calls.
+    Checks an exact sha256 key of the full prompt first; callers that opt in
+    with semantic_text also get a fallback on cosine similarity over sentence
+    embeddings of that text.
+    """
+    
+    def __init__(
+        self,
+        similarity_threshold: float = 0.92,
+        max_entries: int = 1024,
+        embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+        prefix_chars: int = 2000,
+        redis_url: Optional[str] = None,
+        path: Optional[str] = None,
+        ttl: Optional[int] = DEFAULT_TTL
+    ):
+        """
+        Initialize LLM cache.
+        
+        Args:
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            max_entries: Maximum semantic entries kept (and loaded from disk) per scope
+            embedding_model: sentence-transformers model used for embeddings
+            prefix_chars: Number of semantic text characters that are embedded
+            redis_url: Optional Redis URL for the exact-match tier
+            path: Optional SQLite file that persists entries across restarts,
+                opened on first use
+            ttl: Expiry in seconds for cached entries (None to keep them forever)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.embedding_model = embedding_model
+        self.prefix_chars = prefix_chars
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0}
+        
+        self._exact: Dict[str, Tuple[Any, float]] = {}
+        # model + scope -> (embedding matrix, responses, timestamps)
+        self._semantic: Dict[str, Tuple[np.ndarray, List[Any], List[float]]] = {}
+        self._embedder = None
+        self._embeddings_available = True
+        self._redis = None
+        self._path = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+        # Guards the semantic matrices, the in-memory exact tier, stats and the embedder
+        self._lock = threading.Lock()
+        self._embedder_lock = threading.Lock()
+        
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url)
+            except ImportError:
+                logger.error("redis not installed. Install with: pip install redis")
+                raise
+        elif path:
+            self._path = path
+    
+    def _store(self) -> Optional[sqlite3.Connection]:
+        """The on-disk store, opened on first use so importing callers creates no file."""
+        if self._path is not None and self._conn is None:
+            with self._conn_lock:
+                if self._conn is None:
+                    self._init_sqlite(self._path)
+        return self._conn
+    
+    def _init_sqlite(self, path: str):
+        """Open the on-disk store and load the newest persisted embeddings per scope."""
+        db_file = Path(path)
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                scope TEXT NOT NULL,
+                response BLOB NOT NULL,
+                embedding BLOB,
+                ts REAL NOT NULL
+            )
+        """)
+        min_ts = time.time() - self.ttl if self.ttl is not None else None
+        if min_ts is not None:
+            conn.execute("DELETE FROM llm_cache WHERE ts < ?", (min_ts,))
+        conn.commit()
+        
+        rows = conn.execute("""
+            SELECT scope, response, embedding, ts FROM (
+                SELECT scope, response, embedding, ts,
+                       ROW_NUMBER() OVER (PARTITION BY scope ORDER BY ts DESC) AS rank
+                FROM llm_cache
+                WHERE embedding IS NOT NULL
+            )
+            WHERE rank <= ?
+            ORDER BY ts
+        """, (self.max_entries,)).fetchall()
+        for scope, response, embedding, ts in rows:
+            self._add_semantic(
+                scope,
+                np.frombuffer(embedding, dtype=np.float32),
+                orjson.loads(response),
+                ts
+            )
+        self._conn = conn
+        logger.info(f"LLM cache loaded {len(rows)} persisted entries from {path}")
+    
+    def _normalize(self, text: str) -> str:
+        """Normalize the semantic text prefix that is embedded."""
+        return " ".join(text[:self.prefix_chars].split()).lower()
+    
+    @staticmethod
+    def _model_scope(model: str, scope: str) -> str:
+        """Scope of entries for one model, so switching models never reuses answers."""
+        return f"{model}\n{scope}"
+    
+    @staticmethod
+    def _exact_key(model_scope: str, prompt: str) -> str:
+        """Build the sha256 exact-match key over the model, task scope and whole prompt."""
+        return hashlib.sha256(f"{model_scope}\n{prompt}".encode("utf-8")).hexdigest()
+    
+    def _get_embedder(self):
+        """Get or initialize the embedding model (loaded once across threads)."""
+        if self._embedder is None and self._embeddings_available:
+            with self._embedder_lock:
+                if self._embedder is None and self._embeddings_available:
+                    try:
+                        from sentence_transformers import SentenceTransformer
+                        self._embedder = SentenceTransformer(self.embedding_model)
+                    except ImportError:
+                        logger.warning("sentence-transformers not installed, LLM cache uses exact matching only")
+                        self._embeddings_available = False
+        return self._embedder
+    
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Compute a unit-length embedding for text."""
+        embedder = self._get_embedder()
+        if embedder is None:
+            return None
+        vector = embedder.encode(text, normalize_embeddings=True)
+        return np.asarray(vector, dtype=np.float32)
+    
+    def _expired(self, ts: float) -> bool:
+        """Check whether an entry timestamp is past the TTL."""
+        return self.ttl is not None and time.time() - ts > self.ttl
+    
+    def _get_exact(self, key: str) -> Optional[Any]:
+        """Look up an exact-match entry in the configured backend."""
+        if self._redis is not None:
+            cached = self._redis.get(key)
+            return orjson.loads(cached) if cached is not None else None
+        
+        conn = self._store()
+        if conn is not None:
+            with self._conn_lock:
+                row = conn.execute(
+                    "SELECT response, ts FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+            if row and not self._expired(row[1]):
+                return orjson.loads(row[0])
+            return None
+        
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is None:
+                return None
+            response, ts = entry
+            if not self._expired(ts):
+                return response
+            del self._exact[key]
+        return None
+    
+    def _set_exact(self, key: str, scope: str, response: Any, vector: Optional[np.ndarray], ts: float):
+        """Store an exact-match entry in the configured backend."""
+        if self._redis is not None:
+            self._redis.set(key, orjson.dumps(response), ex=self.ttl)
+        elif self._store() is not None:
+            with self._conn_lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, scope, response, embedding, ts) VALUES (?, ?, ?, ?, ?)",
+                    (key, scope, orjson.dumps(response), vector.tobytes() if vector is not None else None, ts)
+                )
+                self._conn.commit()
+        else:
+            with self._lock:
+                self._exact[key] = (response, ts)
+    
+    def _add_semantic(self, scope: str, vector: np.ndarray, response: Any, ts: float):
+        """Append an entry to the semantic matrix for a scope."""
+        with self._lock:
+            entry = self._semantic.get(scope)
+            if entry is None:
+                self._semantic[scope] = (vector[np.newaxis, :], [response], [ts])
+                return
+            
+            matrix, responses, timestamps = entry
+            # Published tuples are never mutated, so readers holding the old one
+            # keep a consistent matrix and response list
+            matrix = np.vstack([matrix, vector])
+            responses = responses + [response]
+            timestamps = timestamps + [ts]
+            
+            # Drop oldest entries beyond capacity
+            overflow = len(responses) - self.max_entries
+            if overflow > 0:
+                matrix = matrix[overflow:]
+                responses = responses[overflow:]
+                timestamps = timestamps[overflow:]
+            
+            self._semantic[scope] = (matrix, responses, timestamps)
+    
+    def _count(self, hit: bool):
+        """Record a lookup in stats."""
+        with self._lock:
+            self.stats["hits" if hit else "misses"] += 1
+    
+    def get(self, model: str, scope: str, prompt: str, semantic_text: Optional[str] = None) -> Optional[Any]:
+        """
+        Look up a cached response.
+        
+        Args:
+            model: Model identifier (e.g. "ollama:llama3")
+            scope: Task identifier including parameters (e.g. "summarize:500")
+            prompt: Full prompt sent to the model
+            semantic_text: Text to match by similarity when there is no exact
+                hit; None (the default) disables the semantic tier
+        
+        Returns:
+            Cached response or None
+        """
+        scope = self._model_scope(model, scope)
+        cached = self._get_exact(self._exact_key(scope, prompt))
+        if cached is not None:
+            self._count(True)
+            return cached
+        
+        if semantic_text is not None:
+            with self._lock:
+                entry = self._semantic.get(scope)
+            if entry is not None:
+                vector = self._embed(self._normalize(semantic_text))
+                if vector is not None:
+                    matrix, responses, timestamps = entry
+                    scores = matrix @ vector
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity_threshold and not self._expired(timestamps[best]):
+                        self._count(True)
+                        return responses[best]
+        
+        self._count(False)
+        return None
+    
+    def set(self, model: str, scope: str, prompt: str, response: Any, semantic_text: Optional[str] = None):
+        """
+        Store a response in the cache.
+        
+        Args:
+            model: Model identifier the response came from
+            scope: Task identifier including parameters
+            prompt: Full prompt sent to the model
+            response: LLM response to cache
+            semantic_text: Text to index for similarity lookups (None to skip)
+        """
+        scope = self._model_scope(model, scope)
+        now = time.time()
+        vector = self._embed(self._normalize(semantic_text)) if semantic_text is not None else None
+        
+        self._set_exact(self._exact_key(scope, prompt), scope, response, vector, now)
+        if vector is not None:
+            self._add_semantic(scope, vector, response, now)
+    
+    def clear(self):
+        """Clear all cached entries."""
+        with self._lock:
+            self._exact.clear()
+            self._semantic.clear()
+            self.stats = {"hits": 0, "misses": 0}
+        if self._store() is not None:
+            with self._conn_lock:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+    
+    def close(self):
+        """Close the on-disk store."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -3,11 +3,63 @@ LLM Summarization Engine
 Handles content summarization and structured data extraction.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, Iterator, AsyncIterator
+from functools import lru_cache
 from loguru import logger
+from .llm import get_llm, parse_llm_json
+from .llm_cache import LLMCache
+import asyncio
 import json
 
 
+# Static instruction blocks go first so providers with prompt caching can
+# reuse the shared prefix; per-call values are appended after them.
+SUMMARIZE_PREFIX = """Summarize the following content.
+Focus on key points and important information.
+"""
+
+EXTRACT_PREFIX = """Extract the requested information from the content and return as JSON.
+Return only valid JSON matching the schema.
+"""
+
+KEYWORDS_PREFIX = """Extract the most important keywords from the following content.
+Return them as a comma-separated list.
+"""
+
+# Content token budgets per task, leaving room for instructions and output
+SUMMARIZE_MAX_TOKENS = 6000
+EXTRACT_MAX_TOKENS = 3000
+KEYWORDS_MAX_TOKENS = 1800
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Get the shared tiktoken encoding, or None if unavailable."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except ImportError:
+        logger.warning("tiktoken not installed, truncating content by characters")
+    except Exception as e:
+        logger.warning(f"Failed to load tiktoken encoding: {e}, truncating content by characters")
+    return None
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """Truncate text to a token budget (about 4 characters per token without tiktoken)."""
+    encoding = _get_encoding()
+    if encoding is None:
+        max_chars = max_tokens * 4
+        return text if len(text) <= max_chars else text[:max_chars] + "..."
+    
+    # No token is longer than this many characters in practice; bounds encode cost
+    head = text[:max_tokens * 8]
+    ids = encoding.encode(head, disallowed_special=())
+    if len(ids) <= max_tokens and len(head) == len(text):
+        return text
+    return encoding.decode(ids[:max_tokens]) + "..."
+
+
 class Summarizer:
     """
     LLM-based summarization and extraction engine.
@@ -17,11 +69,13 @@ class Summarizer:
         self,
         model_type: str = "ollama",
         model_name: str = "llama3",
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        cache: Optional[LLMCache] = None
     ):
         self.model_type = model_type
         self.model_name = model_name
         self.api_key = api_key
+        self.cache = cache if cache is not None else LLMCache()
         self._model = None
     
     def _get_model(self):
@@ -29,27 +83,41 @@ class Summarizer:
         if self._model:
             return self._model
         
-        if self.model_type == "ollama":
-            try:
-                from langchain_ollama import OllamaLLM
-                self._model = OllamaLLM(model=self.model_name)
-            except ImportError:
-                logger.error("langchain_ollama not installed. Install with: pip install langchain-ollama")
-                raise
-        elif self.model_type == "openai":
-            try:
-                from langchain_openai import ChatOpenAI
-                if not self.api_key:
-                    raise ValueError("OpenAI API key required")
-                self._model = ChatOpenAI(model=self.model_name, api_key=self.api_key)
-            except ImportError:
-                logger.error("langchain_openai not installed. Install with: pip install langchain-openai")
-                raise
-        else:
-            raise ValueError(f"Unsupported model type: {self.model_type}")
-        
+        self._model = get_llm(self.model_type, self.model_name, self.api_key)
         return self._model
     
+    @staticmethod
+    def _response_text(response: Any) -> str:
+        """Extract text from an LLM response object."""
+        if isinstance(response, str):
+            return response
+        elif hasattr(response, 'content'):
+            return response.content
+        return str(response)
+    
+    @staticmethod
+    def _build_summarize_prompt(content: str, max_length: int) -> str:
+        """Build the summarization prompt."""
+        # Truncate content if too long
+        content = _truncate_tokens(content, SUMMARIZE_MAX_TOKENS)
+        
+        return SUMMARIZE_PREFIX + f"""
+Target length: approximately {max_length} words
+
+Content:
+{content}
+
+Summary:"""
+    
+    @property
+    def cache_model(self) -> str:
+        """Model identifier that cached responses are keyed on."""
+        return f"{self.model_type}:{self.model_name}"
+    
+    def _cache_scope(self, task: str, params: Any) -> str:
+        """Build the cache scope for a task and its parameters."""
+        return f"{task}:{params}"
+    
     def summarize(self, content: str, max_length: int = 500) -> str:
         """
         Summarize content.
@@ -61,36 +129,182 @@ class Summarizer:
         Returns:
             Summary string
         """
-        model = self._get_model()
-        
-        # Truncate content if too long
-        if len(content) > 10000:
-            content = content[:10000] + "..."
+        scope = self._cache_scope("summarize", max_length)
+        prompt = self._build_summarize_prompt(content, max_length)
+        # Summaries of near-identical pages are interchangeable, so they may
+        # also be served by similarity; other tasks only match exactly
+        cached = self.cache.get(self.cache_model, scope, prompt, semantic_text=content)
+        if cached is not None:
+            return cached
         
-        prompt = f"""Summarize the following content in approximately {max_length} words. 
-Focus on key points and important information.
-
-Content:
-{content}
-
-Summary:"""
+        model = self._get_model()
         
         try:
             if hasattr(model, 'invoke'):
-                response = model.invoke(prompt)
-                if isinstance(response, str):
-                    return response
-                elif hasattr(response, 'content'):
-                    return response.content
-                else:
-                    return str(response)
+                summary = self._response_text(model.invoke(prompt))
             else:
                 # Fallback for different model interfaces
-                return str(model(prompt))
+                summary = str(model(prompt))
+            
+            self.cache.set(self.cache_model, scope, prompt, summary, semantic_text=content)
+            return summary
+        except Exception as e:
+            logger.error(f"Summarization failed: {e}")
+            return f"Error generating summary: {e}"
+    
+    async def asummarize(self, content: str, max_length: int = 500) -> str:
+        """
+        Summarize content without blocking the event loop.
+        
+        Args:
+            content: Content to summarize
+            max_length: Maximum summary length
+            
+        Returns:
+            Summary string
+        """
+        model = self._get_model()
+        if not hasattr(model, 'ainvoke'):
+            return await asyncio.to_thread(self.summarize, content, max_length)
+        
+        scope = self._cache_scope("summarize", max_length)
+        prompt = self._build_summarize_prompt(content, max_length)
+        # Cache lookups embed text and touch SQLite, so they stay off the event loop
+        cached = await asyncio.to_thread(
+            self.cache.get, self.cache_model, scope, prompt, semantic_text=content
+        )
+        if cached is not None:
+            return cached
+        
+        try:
+            summary = self._response_text(await model.ainvoke(prompt))
+            await asyncio.to_thread(
+                self.cache.set, self.cache_model, scope, prompt, summary, semantic_text=content
+            )
+            return summary
         except Exception as e:
             logger.error(f"Summarization failed: {e}")
             return f"Error generating summary: {e}"
     
+    def summarize_batch(self, contents: List[str], max_length: int = 500) -> List[str]:
+        """
+        Summarize many contents in one batched model call.
+        
+        Args:
+            contents: Contents to summarize
+            max_length: Maximum summary length
+            
+        Returns:
+            Summary strings in the same order as contents
+        """
+        model = self._get_model()
+        if not hasattr(model, 'batch'):
+            return [self.summarize(content, max_length) for content in contents]
+        
+        scope = self._cache_scope("summarize", max_length)
+        all_prompts = [self._build_summarize_prompt(content, max_length) for content in contents]
+        summaries: List[Optional[str]] = [
+            self.cache.get(self.cache_model, scope, prompt, semantic_text=content)
+            for prompt, content in zip(all_prompts, contents)
+        ]
+        pending = [i for i, summary in enumerate(summaries) if summary is None]
+        
+        if pending:
+            prompts = [all_prompts[i] for i in pending]
+            responses = model.batch(
+                prompts,
+                config={"max_concurrency": 16},
+                return_exceptions=True
+            )
+            
+            for i, response in zip(pending, responses):
+                if isinstance(response, Exception):
+                    logger.error(f"Summarization failed: {response}")
+                    summaries[i] = f"Error generating summary: {response}"
+                else:
+                    summaries[i] = self._response_text(response)
+                    self.cache.set(self.cache_model, scope, all_prompts[i], summaries[i], semantic_text=contents[i])
+        
+        return summaries
+    
+    def stream_summarize(self, content: str, max_length: int = 500) -> Iterator[str]:
+        """
+        Summarize content, yielding text chunks as the model generates them.
+        
+        Args:
+            content: Content to summarize
+            max_length: Maximum summary length
+            
+        Yields:
+            Summary text chunks
+        """
+        model = self._get_model()
+        if not hasattr(model, 'stream'):
+            yield self.summarize(content, max_length)
+            return
+        
+        scope = self._cache_scope("summarize", max_length)
+        prompt = self._build_summarize_prompt(content, max_length)
+        cached = self.cache.get(self.cache_model, scope, prompt, semantic_text=content)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        
+        try:
+            for chunk in model.stream(prompt):
+                text = self._response_text(chunk)
+                chunks.append(text)
+                yield text
+        except Exception as e:
+            logger.error(f"Summarization failed: {e}")
+            yield f"Error generating summary: {e}"
+            return
+        
+        self.cache.set(self.cache_model, scope, prompt, "".join(chunks), semantic_text=content)
+    
+    async def asummarize_stream(self, content: str, max_length: int = 500) -> AsyncIterator[str]:
+        """
+        Summarize content, asynchronously yielding text chunks as the model generates them.
+        
+        Args:
+            content: Content to summarize
+            max_length: Maximum summary length
+            
+        Yields:
+            Summary text chunks
+        """
+        model = self._get_model()
+        if not hasattr(model, 'astream'):
+            yield await self.asummarize(content, max_length)
+            return
+        
+        scope = self._cache_scope("summarize", max_length)
+        prompt = self._build_summarize_prompt(content, max_length)
+        cached = await asyncio.to_thread(
+            self.cache.get, self.cache_model, scope, prompt, semantic_text=content
+        )
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        
+        try:
+            async for chunk in model.astream(prompt):
+                text = self._response_text(chunk)
+                chunks.append(text)
+                yield text
+        except Exception as e:
+            logger.error(f"Summarization failed: {e}")
+            yield f"Error generating summary: {e}"
+            return
+        
+        await asyncio.to_thread(
+            self.cache.set, self.cache_model, scope, prompt, "".join(chunks), semantic_text=content
+        )
+    
     def extract_structured(self, content: str, schema: Dict[str, Any]) -> Dict[str, Any]:
         """
         Extract structured data from content based on schema.
@@ -102,18 +316,23 @@ Summary:"""
         Returns:
             Extracted data dict
         """
-        model = self._get_model()
-        
         schema_desc = json.dumps(schema, indent=2)
         
-        prompt = f"""Extract the following information from the content and return as JSON.
+        prompt = EXTRACT_PREFIX + f"""
 Schema:
 {schema_desc}
 
 Content:
-{content[:5000]}
+{_truncate_tokens(content, EXTRACT_MAX_TOKENS)}
 
-Return only valid JSON matching the schema:"""
+JSON:"""
+        
+        scope = self._cache_scope("extract_structured", json.dumps(schema, sort_keys=True))
+        cached = self.cache.get(self.cache_model, scope, prompt)
+        if cached is not None:
+            return cached
+        
+        model = self._get_model()
         
         try:
             if hasattr(model, 'invoke'):
@@ -127,14 +346,9 @@ Return only valid JSON matching the schema:"""
             else:
                 response_text = str(model(prompt))
             
-            # Try to parse JSON from response
-            # Remove markdown code blocks if present
-            response_text = response_text.strip()
-            if response_text.startswith("```"):
-                lines = response_text.split("\n")
-                response_text = "\n".join(lines[1:-1])
-            
-            return json.loads(response_text)
+            extracted = parse_llm_json(response_text)
+            self.cache.set(self.cache_model, scope, prompt, extracted)
+            return extracted
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON from LLM response: {e}")
             logger.debug(f"Response was: {response_text[:500]}")
@@ -154,16 +368,21 @@ Return only valid JSON matching the schema:"""
         Returns:
             List of keywords
         """
-        model = self._get_model()
-        
-        prompt = f"""Extract the top {count} most important keywords from the following content.
-Return them as a comma-separated list.
+        prompt = KEYWORDS_PREFIX + f"""
+Number of keywords: {count}
 
 Content:
-{content[:3000]}
+{_truncate_tokens(content, KEYWORDS_MAX_TOKENS)}
 
 Keywords:"""
         
+        scope = self._cache_scope("extract_keywords", count)
+        cached = self.cache.get(self.cache_model, scope, prompt)
+        if cached is not None:
+            return cached
+        
+        model = self._get_model()
+        
         try:
             if hasattr(model, 'invoke'):
                 response = model.invoke(prompt)
@@ -177,8 +396,9 @@ Keywords:"""
                 keywords_text = str(model(prompt))
             
             # Parse keywords
-            keywords = [k.strip() for k in keywords_text.split(",")]
-            return keywords[:count]
+            keywords = [k.strip() for k in keywords_text.split(",")][:count]
+            self.cache.set(self.cache_model, scope, prompt, keywords)
+            return keywords
         except Exception as e:
             logger.error(f"Keyword extraction failed: {e}")
             return []
@@ -4,12 +4,15 @@ Provides API access to the scraper functionality.
 """
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import ORJSONResponse, FileResponse, StreamingResponse
 from pydantic import BaseModel, HttpUrl
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 from loguru import logger
+from bs4 import BeautifulSoup
 
 # Import core modules
 import sys
@@ -21,18 +24,13 @@ from core.parser import DOMParser
 from core.comparator import ProductComparator
 from core.price_tracker import PriceTracker
 from core.export import ExportSystem
-from core.plugins import PluginManager
+from core.plugins import PluginManager, AmazonExtractor, FlipkartExtractor
 from ai.ai_service import AIService
 from database.db import Database
 
-app = FastAPI(
-    title="AI-Driven Universal Web Scraper API",
-    description="REST API for the universal web scraper with AI integration",
-    version="1.0.0"
-)
-
 # Initialize components
 db = Database()
+# Browser is launched lazily on the first request that needs it
 scraper = UniversalScraper(use_browser=True)
 parser = DOMParser("")
 comparator = ProductComparator()
@@ -45,23 +43,47 @@ ai_service = AIService()
 plugin_manager.load_plugins_from_directory()
 
 # Register default extractors
-from core.plugins import AmazonExtractor, FlipkartExtractor
 plugin_manager.register_extractor(AmazonExtractor())
 plugin_manager.register_extractor(FlipkartExtractor())
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release scraper resources (including any launched browser) on shutdown."""
+    yield
+    # BrowserManager.close drives its own event loop, so keep it off this one
+    await asyncio.to_thread(scraper.close)
+
+
+app = FastAPI(
+    title="AI-Driven Universal Web Scraper API",
+    description="REST API for the universal web scraper with AI integration",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+
+def _load_html(html: str):
+    """Parse scraped HTML once into the shared parser."""
+    parser.html = html
+    parser.soup = BeautifulSoup(html, "lxml")
+
+
 # Request/Response Models
 class ScrapeRequest(BaseModel):
     url: HttpUrl
     method: Optional[str] = "auto"
     use_ai: Optional[bool] = False
     extract_schema: Optional[Dict[str, Any]] = None
+    stream_summary: Optional[bool] = False
 
 
 class MultiScrapeRequest(BaseModel):
     urls: List[HttpUrl]
     method: Optional[str] = "auto"
     compare: Optional[bool] = False
+    use_ai: Optional[bool] = False
 
 
 class PriceTrackRequest(BaseModel):
@@ -72,7 +94,7 @@ class PriceTrackRequest(BaseModel):
 
 class ExportRequest(BaseModel):
     data_type: str  # "products", "price_history", "scrape_jobs"
-    format: str  # "json", "csv", "excel", "sql"
+    format: str  # "json", "ndjson", "csv", "excel", "parquet", "sql"
     filters: Optional[Dict[str, Any]] = None
 
 
@@ -123,14 +145,14 @@ async def scrape_url(request: ScrapeRequest, background_tasks: BackgroundTasks):
         # Check for custom extractor
         extractor = plugin_manager.get_extractor_for_url(url)
         
-        # Scrape the page
-        result = scraper.scrape(url, method=request.method)
+        # Scrape the page off the event loop
+        result = await asyncio.to_thread(scraper.scrape, url, method=request.method)
         
         # Parse HTML
-        parser.soup = None  # Reset parser
-        parser.html = result["html"]
-        from bs4 import BeautifulSoup
-        parser.soup = BeautifulSoup(result["html"], "html.parser")
+        _load_html(result["html"])
+        
+        # Walk the DOM for body text once and reuse it below
+        body_text = parser.get_body_text() if request.use_ai or not extractor else None
         
         # Use custom extractor if available
         if extractor:
@@ -140,25 +162,41 @@ async def scrape_url(request: ScrapeRequest, background_tasks: BackgroundTasks):
             data = {
                 "url": url,
                 "title": parser.extract_text("title", clean=True),
-                "text": parser.get_body_text(),
+                "text": body_text,
                 "meta": parser.extract_meta_tags(),
                 "links": parser.extract_links(url),
                 "images": parser.extract_images(url)
             }
         
         # AI processing if requested
-        if request.use_ai:
+        stream_summary = request.use_ai and request.stream_summary and not request.extract_schema
+        if request.use_ai and not stream_summary:
             if request.extract_schema:
-                data["ai_extracted"] = ai_service.extract_data(
-                    parser.get_body_text(),
+                data["ai_extracted"] = await asyncio.to_thread(
+                    ai_service.extract_data,
+                    body_text,
                     request.extract_schema
                 )
             else:
-                data["ai_summary"] = ai_service.summarize_content(parser.get_body_text())
+                data["ai_summary"] = await asyncio.to_thread(
+                    ai_service.summarize_content,
+                    body_text
+                )
+        
+        # Store in database; the result payload is written after the response is sent
+        job_id = await asyncio.to_thread(db.create_scrape_job, url, request.method)
+        background_tasks.add_task(db.update_scrape_job, job_id, "completed", data)
         
-        # Store in database
-        job_id = db.create_scrape_job(url, request.method)
-        db.update_scrape_job(job_id, "completed", data)
+        if stream_summary:
+            # Stream the summary as it is generated; scrape info goes in headers
+            return StreamingResponse(
+                ai_service.astream_summarize_content(body_text),
+                media_type="text/plain",
+                headers={
+                    "X-Job-Id": str(job_id),
+                    "X-Method-Used": str(result.get("method_used"))
+                }
+            )
         
         return {
             "success": True,
@@ -183,40 +221,52 @@ async def multi_scrape(request: MultiScrapeRequest):
     Returns:
         List of scraped data
     """
-    results = []
-    
-    for url in request.urls:
-        try:
-            url_str = str(url)
-            result = scraper.scrape(url_str, method=request.method)
-            
-            parser.soup = None
-            parser.html = result["html"]
-            from bs4 import BeautifulSoup
-            parser.soup = BeautifulSoup(result["html"], "html.parser")
-            
-            extractor = plugin_manager.get_extractor_for_url(url_str)
-            if extractor:
-                data = extractor.extract(result["html"], url_str)
-            else:
-                data = {
-                    "url": url_str,
-                    "title": parser.extract_text("title", clean=True),
-                    "text": parser.get_body_text()
-                }
-            
-            results.append(data)
+    async def _scrape_one(url: HttpUrl) -> Dict[str, Any]:
+        url_str = str(url)
+        result = await asyncio.to_thread(scraper.scrape, url_str, method=request.method)
+        
+        _load_html(result["html"])
         
-        except Exception as e:
-            logger.error(f"Failed to scrape {url}: {e}")
+        extractor = plugin_manager.get_extractor_for_url(url_str)
+        if extractor:
+            return extractor.extract(result["html"], url_str)
+        return {
+            "url": url_str,
+            "title": parser.extract_text("title", clean=True),
+            "text": parser.get_body_text()
+        }
+    
+    # Fetch all URLs concurrently, isolating per-URL failures
+    outcomes = await asyncio.gather(
+        *[_scrape_one(url) for url in request.urls],
+        return_exceptions=True
+    )
+    
+    results = []
+    for url, outcome in zip(request.urls, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(f"Failed to scrape {url}: {outcome}")
             results.append({
                 "url": str(url),
-                "error": str(e)
+                "error": str(outcome)
             })
+        else:
+            results.append(outcome)
+    
+    # Summarize all page texts in one batched LLM call
+    if request.use_ai:
+        to_summarize = [r for r in results if r.get("text")]
+        if to_summarize:
+            summaries = await asyncio.to_thread(
+                ai_service.summarize_batch,
+                [r["text"] for r in to_summarize]
+            )
+            for r, summary in zip(to_summarize, summaries):
+                r["ai_summary"] = summary
     
     # Compare if requested
     if request.compare and len(results) > 1:
-        comparison = comparator.compare_products(results)
+        comparison = await comparator.compare_products_async(results)
         return {
             "success": True,
             "results": results,
@@ -241,8 +291,9 @@ async def compare_products(products: List[Dict[str, Any]]):
         Comparison report
     """
     try:
-        comparison = comparator.compare_products(products)
-        best_value = comparator.find_best_value(products)
+        comparison = await comparator.compare_products_async(products)
+        # Reuse the already-normalized products from the comparison
+        best_value = comparator.find_best_value(comparison.get("products", []))
         
         return {
             "success": True,
@@ -269,11 +320,8 @@ async def track_price(request: PriceTrackRequest):
         url = str(request.url)
         
         # Scrape initial product data
-        result = scraper.scrape(url)
-        parser.soup = None
-        parser.html = result["html"]
-        from bs4 import BeautifulSoup
-        parser.soup = BeautifulSoup(result["html"], "html.parser")
+        result = await asyncio.to_thread(scraper.scrape, url)
+        _load_html(result["html"])
         
         extractor = plugin_manager.get_extractor_for_url(url)
         if extractor:
@@ -285,11 +333,11 @@ async def track_price(request: PriceTrackRequest):
             }
         
         product_data["url"] = url
-        product_id = price_tracker.track_product(product_data)
+        product_id = await asyncio.to_thread(price_tracker.track_product, product_data)
         
         # Set alert if threshold provided
         if request.alert_threshold:
-            price_tracker.set_alert(product_id, "drop", request.alert_threshold)
+            await asyncio.to_thread(price_tracker.set_alert, product_id, "drop", request.alert_threshold)
         
         return {
             "success": True,
@@ -315,8 +363,8 @@ async def get_price_history(product_id: int, days: Optional[int] = None):
         Price history data
     """
     try:
-        history = price_tracker.get_price_history(product_id, days)
-        trend = price_tracker.get_price_trend(product_id, days or 30)
+        history = await asyncio.to_thread(price_tracker.get_price_history, product_id, days)
+        trend = await asyncio.to_thread(price_tracker.get_price_trend, product_id, days or 30)
         
         return {
             "success": True,
@@ -343,7 +391,7 @@ async def export_data(request: ExportRequest):
     try:
         # Get data from database
         if request.data_type == "products":
-            data = db.get_all_products()
+            data = await asyncio.to_thread(db.get_all_products)
         elif request.data_type == "price_history":
             # This would need product_id in request
             raise HTTPException(status_code=400, detail="product_id required for price_history export")
@@ -352,11 +400,15 @@ async def export_data(request: ExportRequest):
         
         # Export
         if request.format == "json":
-            filepath = export_system.export_to_json(data)
+            filepath = await asyncio.to_thread(export_system.export_to_json, data)
+        elif request.format == "ndjson":
+            filepath = await asyncio.to_thread(export_system.export_to_ndjson, data)
         elif request.format == "csv":
-            filepath = export_system.export_to_csv(data)
+            filepath = await asyncio.to_thread(export_system.export_to_csv, data)
         elif request.format == "excel":
-            filepath = export_system.export_to_excel(data)
+            filepath = await asyncio.to_thread(export_system.export_to_excel, data)
+        elif request.format == "parquet":
+            filepath = await asyncio.to_thread(export_system.export_to_parquet, data)
         else:
             raise HTTPException(status_code=400, detail=f"Unsupported format: {request.format}")
         
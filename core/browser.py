@@ -4,12 +4,32 @@ Handles Playwright-based scraping with headless browser, network interception, a
 """
 
 import asyncio
+import threading
 from typing import Dict, Optional, Any, List
+from urllib.parse import urlparse
 from loguru import logger
 from playwright.async_api import async_playwright, Browser, Page, BrowserContext
+from .anti_block import AntiBlockEngine
 import time
 
 
+# Only page documents and API calls are worth recording when intercepting
+CAPTURED_RESOURCE_TYPES = frozenset({"document", "xhr", "fetch"})
+
+# Same serialization as page.content(): doctype plus the document element
+PAGE_SNAPSHOT_JS = """() => ({
+    html: (document.doctype ? new XMLSerializer().serializeToString(document.doctype) : "")
+        + document.documentElement.outerHTML,
+    title: document.title,
+    url: location.href
+})"""
+
+HEIGHT_AFTER_PAINT_JS = "() => new Promise(r => requestAnimationFrame(() => r(document.body.scrollHeight)))"
+
+# Concurrent pages allowed against a single host
+DEFAULT_PER_HOST = 2
+
+
 class BrowserManager:
     """
     Manages browser automation using Playwright.
@@ -21,18 +41,46 @@ class BrowserManager:
         headless: bool = True,
         browser_type: str = "chromium",
         viewport: Optional[Dict] = None,
-        user_agent: Optional[str] = None
+        user_agent: Optional[str] = None,
+        max_parallel: int = 5,
+        per_host: int = DEFAULT_PER_HOST,
+        anti_block: Optional[AntiBlockEngine] = None
     ):
         self.headless = headless
         self.browser_type = browser_type
         self.viewport = viewport or {"width": 1920, "height": 1080}
         self.user_agent = user_agent
+        self.max_parallel = max_parallel
+        self.per_host = per_host
+        # Optional shared rate limit applied before each navigation
+        self.anti_block = anti_block
         self.browser: Optional[Browser] = None
-        self.context: Optional[BrowserContext] = None
         self.playwright = None
+        # One context per concurrent page; checking one out bounds parallelism
+        self._contexts: List[BrowserContext] = []
+        self._context_pool: Optional[asyncio.Queue] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        # Serializes _init_browser so concurrent first scrapes share one browser;
+        # created on the loop that runs the Playwright objects
+        self._init_lock: Optional[asyncio.Lock] = None
+        # Loop owning the Playwright objects for the sync wrappers, run in a daemon thread
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
         
     async def _init_browser(self):
-        """Initialize browser and context."""
+        """Initialize browser and context pool."""
+        if self._context_pool is not None:
+            return
+        
+        if self._init_lock is None:
+            # No await since the check, so tasks on this loop get the same lock
+            self._init_lock = asyncio.Lock()
+        async with self._init_lock:
+            await self._start_browser()
+    
+    async def _start_browser(self):
+        """Start whatever of Playwright, the browser and the context pool is missing."""
         if not self.playwright:
             self.playwright = await async_playwright().start()
         
@@ -46,14 +94,20 @@ class BrowserManager:
             else:
                 raise ValueError(f"Unknown browser type: {self.browser_type}")
         
-        if not self.context:
+        if self._context_pool is None:
             context_options = {
                 "viewport": self.viewport,
             }
             if self.user_agent:
                 context_options["user_agent"] = self.user_agent
             
-            self.context = await self.browser.new_context(**context_options)
+            # Published only once filled, so the unlocked check above never sees a partial pool
+            context_pool = asyncio.Queue()
+            for _ in range(self.max_parallel):
+                context = await self.browser.new_context(**context_options)
+                self._contexts.append(context)
+                context_pool.put_nowait(context)
+            self._context_pool = context_pool
     
     async def scrape_page_async(
         self,
@@ -84,7 +138,38 @@ class BrowserManager:
         """
         await self._init_browser()
         
-        page = await self.context.new_page()
+        # Wait for a host slot before taking a context, so throttled hosts don't idle the pool
+        host = urlparse(url).netloc
+        host_semaphore = self._host_semaphores.get(host)
+        if host_semaphore is None:
+            host_semaphore = self._host_semaphores[host] = asyncio.Semaphore(self.per_host)
+        
+        async with host_semaphore:
+            if self.anti_block:
+                await self.anti_block.arate_limit_check()
+            
+            context = await self._context_pool.get()
+            try:
+                return await self._scrape_one(
+                    context, url, headers, timeout, wait_until, auto_scroll, intercept_network, screenshots
+                )
+            finally:
+                self._context_pool.put_nowait(context)
+    
+    async def _scrape_one(
+        self,
+        context: BrowserContext,
+        url: str,
+        headers: Optional[Dict] = None,
+        timeout: int = 30000,
+        wait_until: str = "networkidle",
+        auto_scroll: bool = True,
+        intercept_network: bool = False,
+        screenshots: bool = False,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Load one page on a checked-out context and collect its content."""
+        page = await context.new_page()
         network_responses = []
         
         try:
@@ -95,6 +180,9 @@ class BrowserManager:
             # Intercept network if requested
             if intercept_network:
                 async def handle_response(response):
+                    # Skip static assets before any further driver round-trips
+                    if response.request.resource_type not in CAPTURED_RESOURCE_TYPES:
+                        return
                     try:
                         network_responses.append({
                             "url": response.url,
@@ -117,13 +205,13 @@ class BrowserManager:
             # Wait a bit for any remaining dynamic content
             await page.wait_for_timeout(1000)
             
-            # Get page content
-            html = await page.content()
+            # Get page content, title and URL in one driver round-trip
+            snapshot = await page.evaluate(PAGE_SNAPSHOT_JS)
             
             result = {
-                "html": html,
-                "url": page.url,
-                "title": await page.title(),
+                "html": snapshot["html"],
+                "url": snapshot["url"],
+                "title": snapshot["title"],
                 "network_responses": network_responses if intercept_network else []
             }
             
@@ -137,25 +225,63 @@ class BrowserManager:
         finally:
             await page.close()
     
-    async def _auto_scroll(self, page: Page, scroll_delay: float = 0.5):
+    async def scrape_pages_async(self, urls: List[str], **kwargs) -> List[Dict[str, Any]]:
+        """
+        Scrape several pages concurrently, one pooled context per page.
+        At most max_parallel pages are open at a time, and at most
+        per_host against any single host.
+        
+        Args:
+            urls: Target URLs
+            **kwargs: Additional arguments for scrape_page_async
+            
+        Returns:
+            List of result dicts in the same order as urls; failed pages
+            have 'url' and 'error' keys
+        """
+        await self._init_browser()
+        
+        outcomes = await asyncio.gather(
+            *(self.scrape_page_async(url, **kwargs) for url in urls),
+            return_exceptions=True
+        )
+        
+        results = []
+        for url, outcome in zip(urls, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Failed to scrape {url}: {outcome}")
+                results.append({"url": url, "error": str(outcome)})
+            else:
+                results.append(outcome)
+        return results
+    
+    async def _auto_scroll(
+        self,
+        page: Page,
+        scroll_delay: float = 0.2,
+        max_scrolls: int = 10,
+        max_delay: float = 1.6
+    ):
         """Auto-scroll page to load lazy content."""
         last_height = await page.evaluate("document.body.scrollHeight")
+        delay = scroll_delay
         
-        while True:
+        for _ in range(max_scrolls):
             # Scroll to bottom
             await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            await page.wait_for_timeout(int(scroll_delay * 1000))
+            await page.wait_for_timeout(int(delay * 1000))
             
-            # Calculate new height
-            new_height = await page.evaluate("document.body.scrollHeight")
+            # Measure height after the next paint rather than after a fixed wait
+            new_height = await page.evaluate(HEIGHT_AFTER_PAINT_JS)
             
             if new_height == last_height:
                 break
             last_height = new_height
+            # Content is lazy-loading; allow more time for the next batch
+            delay = min(delay * 2, max_delay)
         
-        # Scroll back to top
+        # Scroll back to top; scrape_page_async waits for settling afterwards
         await page.evaluate("window.scrollTo(0, 0)")
-        await page.wait_for_timeout(500)
     
     def scrape_page(
         self,
@@ -169,8 +295,24 @@ class BrowserManager:
         Returns only HTML content.
         """
         timeout_ms = timeout * 1000
-        result = asyncio.run(self.scrape_page_async(url, headers, timeout_ms, **kwargs))
-        return result["html"]
+        future = asyncio.run_coroutine_threadsafe(
+            self.scrape_page_async(url, headers, timeout_ms, **kwargs),
+            self._get_loop()
+        )
+        return future.result()["html"]
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get or start the background event loop used by the sync wrappers."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="browser-loop",
+                    daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
     
     async def scrape_authenticated_async(
         self,
@@ -195,7 +337,9 @@ class BrowserManager:
         """
         await self._init_browser()
         
-        page = await self.context.new_page()
+        # Keep the same context for login and scrape so the session cookies apply
+        context = await self._context_pool.get()
+        page = await context.new_page()
         
         try:
             # Navigate to login page
@@ -217,22 +361,50 @@ class BrowserManager:
             await page.wait_for_load_state("networkidle")
             
             # Now scrape the target URL
-            return await self.scrape_page_async(url, **kwargs)
+            return await self._scrape_one(context, url, **kwargs)
             
         finally:
             await page.close()
+            self._context_pool.put_nowait(context)
     
-    def close(self):
-        """Close browser and cleanup resources."""
-        if self.context:
-            asyncio.run(self.context.close())
-            self.context = None
+    async def aclose(self):
+        """Close browser and cleanup resources from async code."""
+        for context in self._contexts:
+            await context.close()
+        self._contexts = []
+        self._context_pool = None
+        self._host_semaphores = {}
+        # A later start may run on a new loop (see close)
+        self._init_lock = None
         
         if self.browser:
-            asyncio.run(self.browser.close())
+            await self.browser.close()
             self.browser = None
         
         if self.playwright:
-            asyncio.run(self.playwright.stop())
+            await self.playwright.stop()
             self.playwright = None
-
+    
+    def close(self):
+        """Close browser and cleanup resources."""
+        with self._loop_lock:
+            if self._loop is not None:
+                # Browser objects belong to the background loop; close them there
+                asyncio.run_coroutine_threadsafe(self.aclose(), self._loop).result()
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop_thread.join()
+                self._loop.close()
+                self._loop = None
+                self._loop_thread = None
+                return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if loop is not None:
+            # Called from async code; asyncio.run would fail inside a running loop
+            loop.create_task(self.aclose())
+        else:
+            asyncio.run(self.aclose())
@@ -3,10 +3,65 @@ Multi-Website Comparison Engine
 Handles normalization of product data and comparison across multiple sources.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
+from dataclasses import dataclass, field
 from loguru import logger
 from datetime import datetime
+import asyncio
 import re
+import numpy as np
+
+
+# Keys held as NormalizedProduct fields rather than in its extra dict; the
+# "_normalized" flag earlier responses carried is dropped, never trusted
+_PRODUCT_FIELDS = frozenset({
+    "source", "url", "scraped_at", "price", "title", "brand", "rating", "availability", "_normalized"
+})
+
+
+@dataclass(slots=True)
+class NormalizedProduct:
+    """Product data normalized for comparison across sources."""
+    source: str
+    url: str
+    scraped_at: str
+    price: Optional[float] = None
+    title: Optional[str] = None
+    brand: Optional[str] = None
+    rating: Optional[float] = None
+    availability: Optional[bool] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the plain dict returned by the API."""
+        data = {
+            "source": self.source,
+            "url": self.url,
+            "scraped_at": self.scraped_at,
+            "price": self.price,
+            "title": self.title,
+            "brand": self.brand,
+            "rating": self.rating,
+            "availability": self.availability
+        }
+        for key, value in self.extra.items():
+            data.setdefault(key, value)
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "NormalizedProduct":
+        """Rebuild from a dict produced by to_dict."""
+        return cls(
+            source=data.get("source", "unknown"),
+            url=data.get("url", ""),
+            scraped_at=data.get("scraped_at", ""),
+            price=data.get("price"),
+            title=data.get("title"),
+            brand=data.get("brand"),
+            rating=data.get("rating"),
+            availability=data.get("availability"),
+            extra={k: v for k, v in data.items() if k not in _PRODUCT_FIELDS}
+        )
 
 
 class ProductComparator:
@@ -15,6 +70,12 @@ class ProductComparator:
     Normalizes product attributes and generates comparison reports.
     """
     
+    _PRICE_CLEAN_RE = re.compile(r'[^\d.]')
+    _WS_RE = re.compile(r'\s+')
+    _RATING_NUM_RE = re.compile(r'(\d+\.?\d*)')
+    _AVAIL_POS_RE = re.compile(r'\b(?:in stock|available|yes|true|1)\b', re.I)
+    _AVAIL_NEG_RE = re.compile(r'\b(?:out of stock|unavailable|sold out|no|false|0)\b', re.I)
+    
     def __init__(self):
         self.normalization_rules = {
             "price": self._normalize_price,
@@ -24,7 +85,11 @@ class ProductComparator:
             "availability": self._normalize_availability
         }
     
-    def normalize_product(self, product: Dict[str, Any], source: str) -> Dict[str, Any]:
+    def normalize_product(
+        self,
+        product: Union[Dict[str, Any], NormalizedProduct],
+        source: str
+    ) -> NormalizedProduct:
         """
         Normalize product data from a source.
         
@@ -33,40 +98,84 @@ class ProductComparator:
             source: Source website name
             
         Returns:
-            Normalized product dict
+            NormalizedProduct (use to_dict() for a plain dict)
         """
-        normalized = {
-            "source": source,
-            "url": product.get("url", ""),
-            "scraped_at": datetime.now().isoformat()
-        }
+        return self._normalize_one(product, source, datetime.now().isoformat())
+    
+    def normalize_products(
+        self,
+        products: List[Union[Dict[str, Any], NormalizedProduct]]
+    ) -> List[NormalizedProduct]:
+        """
+        Normalize a batch of products, sharing one scraped_at timestamp.
+        
+        Args:
+            products: Raw product dicts, each with an optional 'source' key
+            
+        Returns:
+            List of NormalizedProduct
+        """
+        scraped_at = datetime.now().isoformat()
+        return [
+            p if isinstance(p, NormalizedProduct)
+            else self._normalize_one(p, p.get("source", "unknown"), scraped_at)
+            for p in products
+        ]
+    
+    def _normalize_one(
+        self,
+        product: Union[Dict[str, Any], NormalizedProduct],
+        source: str,
+        scraped_at: str
+    ) -> NormalizedProduct:
+        """Normalize one product with a precomputed timestamp."""
+        # Already normalized (e.g. from compare_products); skip the normalizers.
+        # Dicts always go through them, since callers control their contents
+        if isinstance(product, NormalizedProduct):
+            return product
         
         # Normalize each field
-        for field, normalizer in self.normalization_rules.items():
-            if field in product:
-                normalized[field] = normalizer(product[field])
-            else:
-                normalized[field] = None
-        
-        # Copy other fields
-        for key, value in product.items():
-            if key not in normalized:
-                normalized[key] = value
-        
-        return normalized
+        values = {
+            name: normalizer(product[name]) if name in product else None
+            for name, normalizer in self.normalization_rules.items()
+        }
+        
+        return NormalizedProduct(
+            source=source,
+            url=product.get("url", ""),
+            scraped_at=scraped_at,
+            **values,
+            # Copy other fields
+            extra={k: v for k, v in product.items() if k not in _PRODUCT_FIELDS}
+        )
+    
+    @staticmethod
+    def _fast_float(value: str) -> Optional[float]:
+        """Parse digits with at most one period; anything else (signs, exponents) returns None for the regex path."""
+        if value[:1].isdecimal() and value.replace('.', '', 1).isdecimal():
+            return float(value)
+        return None
     
     def _normalize_price(self, price: Any) -> Optional[float]:
         """Normalize price to float."""
+        # Most common case first: already normalized
+        if type(price) is float:
+            return price
+        
         if price is None:
             return None
         
         if isinstance(price, (int, float)):
             return float(price)
         
-        # Extract number from string
+        # Clean numeric strings need no regex
         price_str = str(price)
+        fast_price = self._fast_float(price_str)
+        if fast_price is not None:
+            return fast_price
+        
         # Remove currency symbols and commas
-        price_str = re.sub(r'[^\d.]', '', price_str)
+        price_str = self._PRICE_CLEAN_RE.sub('', price_str)
         
         try:
             return float(price_str)
@@ -81,7 +190,7 @@ class ProductComparator:
         
         title_str = str(title).strip()
         # Remove extra whitespace
-        title_str = re.sub(r'\s+', ' ', title_str)
+        title_str = self._WS_RE.sub(' ', title_str)
         
         return title_str
     
@@ -95,6 +204,10 @@ class ProductComparator:
     
     def _normalize_rating(self, rating: Any) -> Optional[float]:
         """Normalize rating to float (0-5 scale)."""
+        # Most common case first: already a float on a 5-point scale
+        if type(rating) is float and rating <= 5:
+            return rating
+        
         if rating is None:
             return None
         
@@ -104,20 +217,20 @@ class ProductComparator:
                 return rating / 10.0  # Convert 10-point to 5-point
             return float(rating)
         
-        # Extract number from string
+        # Plain numeric strings skip the regex
         rating_str = str(rating)
-        rating_match = re.search(r'(\d+\.?\d*)', rating_str)
-        
-        if rating_match:
-            try:
-                rating_val = float(rating_match.group(1))
-                if rating_val > 5:
-                    rating_val = rating_val / 10.0
-                return rating_val
-            except ValueError:
-                pass
-        
-        return None
+        rating_val = self._fast_float(rating_str)
+        
+        if rating_val is None:
+            # Extract number from string
+            rating_match = self._RATING_NUM_RE.search(rating_str)
+            if not rating_match:
+                return None
+            rating_val = float(rating_match.group(1))
+        
+        if rating_val > 5:
+            rating_val = rating_val / 10.0
+        return rating_val
     
     def _normalize_availability(self, availability: Any) -> bool:
         """Normalize availability to boolean."""
@@ -127,21 +240,13 @@ class ProductComparator:
         if isinstance(availability, bool):
             return availability
         
-        availability_str = str(availability).lower()
-        
-        # Check for positive indicators
-        positive_indicators = ["in stock", "available", "yes", "true", "1"]
-        negative_indicators = ["out of stock", "unavailable", "no", "false", "0", "sold out"]
-        
-        for indicator in positive_indicators:
-            if indicator in availability_str:
-                return True
+        availability_str = str(availability)
         
-        for indicator in negative_indicators:
-            if indicator in availability_str:
-                return False
+        # Whole-word matches, negatives first so "unavailable" is not read as "available"
+        if self._AVAIL_NEG_RE.search(availability_str):
+            return False
         
-        return False
+        return self._AVAIL_POS_RE.search(availability_str) is not None
     
     def compare_products(self, products: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -157,44 +262,57 @@ class ProductComparator:
             return {"error": "No products to compare"}
         
         # Normalize all products
-        normalized = [self.normalize_product(p, p.get("source", "unknown")) for p in products]
-        
-        # Find best price
-        prices = [p.get("price") for p in normalized if p.get("price") is not None]
-        best_price = min(prices) if prices else None
-        best_price_product = next(
-            (p for p in normalized if p.get("price") == best_price),
-            None
-        )
+        normalized = self.normalize_products(products)
+        
+        # Single pass over the products; missing values become NaN
+        price_values = []
+        rating_values = []
+        available_products = []
+        product_dicts = []
+        for p in normalized:
+            product_dict = p.to_dict()
+            product_dicts.append(product_dict)
+            price_values.append(np.nan if p.price is None else p.price)
+            rating_values.append(np.nan if p.rating is None else p.rating)
+            if p.availability:
+                available_products.append(product_dict)
+        prices = np.array(price_values, dtype=np.float64)
+        ratings = np.array(rating_values, dtype=np.float64)
+        priced = np.flatnonzero(~np.isnan(prices))
+        
+        # Find best price (first product with the lowest price)
+        best_price = None
+        best_price_product = None
+        if priced.size:
+            best_idx = int(np.nanargmin(prices))
+            best_price = float(prices[best_idx])
+            best_price_product = product_dicts[best_idx]
         
         # Find highest rating
-        ratings = [p.get("rating") for p in normalized if p.get("rating") is not None]
-        best_rating = max(ratings) if ratings else None
-        best_rating_product = next(
-            (p for p in normalized if p.get("rating") == best_rating),
-            None
-        )
-        
-        # Find available products
-        available_products = [p for p in normalized if p.get("availability", False)]
+        best_rating = None
+        best_rating_product = None
+        if not np.isnan(ratings).all():
+            best_idx = int(np.nanargmax(ratings))
+            best_rating = float(ratings[best_idx])
+            best_rating_product = product_dicts[best_idx]
         
         # Calculate average price
-        avg_price = sum(prices) / len(prices) if prices else None
+        avg_price = float(prices[priced].mean()) if priced.size else None
         
         # Price difference analysis
         price_differences = {}
-        if len(prices) > 1:
-            for product in normalized:
-                if product.get("price") is not None:
-                    diff = product["price"] - best_price
-                    price_differences[product["source"]] = {
-                        "difference": diff,
-                        "percentage": (diff / best_price * 100) if best_price else 0
-                    }
+        if priced.size > 1:
+            diffs = prices[priced] - best_price
+            percentages = diffs / best_price * 100 if best_price else np.zeros_like(diffs)
+            for i, diff, percentage in zip(priced.tolist(), diffs.tolist(), percentages.tolist()):
+                price_differences[normalized[i].source] = {
+                    "difference": diff,
+                    "percentage": percentage
+                }
         
         return {
             "total_products": len(normalized),
-            "products": normalized,
+            "products": product_dicts,
             "best_price": {
                 "price": best_price,
                 "product": best_price_product
@@ -210,6 +328,21 @@ class ProductComparator:
             "comparison_date": datetime.now().isoformat()
         }
     
+    async def compare_products_async(self, products: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Compare products in a worker thread.
+        Normalization is CPU-bound; use this from async code so it does not
+        stall in-flight page loads on the event loop.
+        
+        Args:
+            products: List of product dicts
+            
+        Returns:
+            Comparison report dict
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.compare_products, products)
+    
     def find_best_value(self, products: List[Dict[str, Any]], 
                        price_weight: float = 0.6, 
                        rating_weight: float = 0.4) -> Optional[Dict[str, Any]]:
@@ -227,20 +360,20 @@ class ProductComparator:
         if not products:
             return None
         
-        normalized = [self.normalize_product(p, p.get("source", "unknown")) for p in products]
+        normalized = self.normalize_products(products)
         
         # Filter products with both price and rating
         valid_products = [
             p for p in normalized 
-            if p.get("price") is not None and p.get("rating") is not None
+            if p.price is not None and p.rating is not None
         ]
         
         if not valid_products:
             return None
         
         # Normalize scores (0-1 scale)
-        prices = [p["price"] for p in valid_products]
-        ratings = [p["rating"] for p in valid_products]
+        prices = [p.price for p in valid_products]
+        ratings = [p.rating for p in valid_products]
         
         min_price = min(prices)
         max_price = max(prices)
@@ -253,10 +386,10 @@ class ProductComparator:
         
         for product in valid_products:
             # Lower price is better (inverted)
-            price_score = 1 - ((product["price"] - min_price) / (max_price - min_price)) if max_price != min_price else 1
+            price_score = 1 - ((product.price - min_price) / (max_price - min_price)) if max_price != min_price else 1
             
             # Higher rating is better
-            rating_score = (product["rating"] - min_rating) / (max_rating - min_rating) if max_rating != min_rating else 1
+            rating_score = (product.rating - min_rating) / (max_rating - min_rating) if max_rating != min_rating else 1
             
             # Combined score
             value_score = (price_score * price_weight) + (rating_score * rating_weight)
@@ -266,7 +399,7 @@ class ProductComparator:
                 best_product = product
         
         if best_product:
-            best_product["value_score"] = best_score
+            return {**best_product.to_dict(), "value_score": best_score}
         
-        return best_product
+        return None
 
@@ -1,22 +1,123 @@
 """
 Export System Module
-Handles exporting scraped data to various formats: CSV, JSON, Excel, SQL, API.
+Handles exporting scraped data to various formats: CSV, JSON, NDJSON, Excel, Parquet, SQL, API.
 """
 
 import json
-import csv
-import sqlite3
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any, Union
 from pathlib import Path
 from datetime import datetime
 from loguru import logger
-import pandas as pd
+import orjson
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.json as pajson
+import pyarrow.parquet as pq
+
+try:
+    from adbc_driver_sqlite import dbapi as adbc_sqlite
+except ImportError:
+    adbc_sqlite = None
+
+
+# Rows per executemany call in export_to_sql
+SQL_BATCH_SIZE = 10000
+# Bytes of NDJSON parsed per Arrow block in load_ndjson
+NDJSON_BLOCK_SIZE = 1 << 20
+
+
+def _fieldnames(data: List[Dict[str, Any]], sort_columns: bool = False) -> List[str]:
+    """Union of record keys in first-seen order, or sorted if requested."""
+    fieldnames = list(dict.fromkeys(key for record in data for key in record))
+    return sorted(fieldnames) if sort_columns else fieldnames
+
+
+def _arrow_table(data: List[Dict[str, Any]], fieldnames: List[str]) -> "pa.Table":
+    """Build an Arrow table over all fieldnames; missing keys become nulls."""
+    # Table.from_pylist takes its columns from the first record only
+    return pa.table({name: [record.get(name) for record in data] for name in fieldnames})
+
+
+def _try_arrow_table(data: List[Dict[str, Any]], fieldnames: List[str]) -> Optional["pa.Table"]:
+    """Arrow table for the records, or None if a column mixes value types."""
+    try:
+        return _arrow_table(data, fieldnames)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        logger.debug(f"Records cannot be converted to Arrow: {e}")
+        return None
+
+
+def _csv_text(value: Any) -> Optional[str]:
+    """Format one value the way Arrow's CSV writer would; nested values become JSON."""
+    if value is None:
+        return None
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    try:
+        return pa.array([value]).cast(pa.string())[0].as_py()
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return str(value)
+
+
+def _csv_column(values: List[Any]) -> "pa.Array":
+    """Arrow column for CSV; mixed-type and nested columns are formatted as text."""
+    try:
+        column = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        column = None
+    if column is None or pa.types.is_nested(column.type):
+        return pa.array([_csv_text(value) for value in values], pa.string())
+    return column
+
+
+def _csv_table(data: List[Dict[str, Any]], fieldnames: List[str]) -> "pa.Table":
+    """Arrow table the CSV writer accepts for any records."""
+    return pa.table({name: _csv_column([record.get(name) for record in data]) for name in fieldnames})
+
+
+def _is_sqlite_arrow_type(arrow_type: "pa.DataType") -> bool:
+    """Arrow types the ADBC SQLite driver ingests like the sqlite3 path would."""
+    return (
+        pa.types.is_integer(arrow_type)
+        or pa.types.is_floating(arrow_type)
+        or pa.types.is_boolean(arrow_type)
+        or pa.types.is_string(arrow_type)
+        or pa.types.is_null(arrow_type)
+    )
+
+
+def _quote_identifier(name: str) -> str:
+    """Quote a table or column name for SQLite."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sqlite_type(data: List[Dict[str, Any]], column: str) -> str:
+    """Pick a column type from the first non-null value."""
+    for record in data:
+        value = record.get(column)
+        if value is None:
+            continue
+        if isinstance(value, (bool, int)):
+            return "INTEGER"
+        if isinstance(value, float):
+            return "REAL"
+        return "TEXT"
+    return "TEXT"
+
+
+def _sqlite_value(value: Any) -> Any:
+    """Convert a record value to something sqlite3 can bind."""
+    if value is None or isinstance(value, (str, int, float, bytes)):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
 
 
 class ExportSystem:
     """
     Export system for scraped data.
-    Supports CSV, JSON, Excel, SQL, and API endpoints.
+    Supports CSV, JSON, NDJSON, Excel, Parquet, SQL, and API endpoints.
     """
     
     def __init__(self, output_dir: str = "exports"):
@@ -53,20 +154,74 @@ class ExportSystem:
         
         filepath = self.output_dir / filename
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            if pretty:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-            else:
-                json.dump(data, f, ensure_ascii=False, default=str)
+        # orjson writes UTF-8 bytes directly and handles datetimes and numpy natively
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(data, default=str, option=options))
         
         logger.info(f"Exported {len(data)} records to JSON: {filepath}")
         return str(filepath)
     
+    def export_to_ndjson(
+        self,
+        records: Iterable[Dict[str, Any]],
+        filename: Optional[str] = None
+    ) -> str:
+        """
+        Export data to newline-delimited JSON, one record per line.
+        Records are written as the iterable is consumed, so a generator
+        can be exported without holding every record in memory.
+        
+        Args:
+            records: List or any iterable of dictionaries to export
+            filename: Output filename (auto-generated if None)
+            
+        Returns:
+            Path to exported file
+        """
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"export_{timestamp}.ndjson"
+        
+        filepath = self.output_dir / filename
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        
+        count = 0
+        with open(filepath, 'wb') as f:
+            for record in records:
+                f.write(orjson.dumps(record, default=str, option=options))
+                count += 1
+        
+        logger.info(f"Exported {count} records to NDJSON: {filepath}")
+        return str(filepath)
+    
+    def load_ndjson(self, filepath: Union[str, Path]) -> "pa.Table":
+        """
+        Read an NDJSON export back as an Arrow table.
+        Parsing runs in Arrow's multithreaded C++ reader; the table can be
+        passed straight to export_all without converting to records first.
+        
+        Args:
+            filepath: Path to an NDJSON file
+            
+        Returns:
+            Arrow table with one row per line
+        """
+        table = pajson.read_json(
+            str(filepath), read_options=pajson.ReadOptions(block_size=NDJSON_BLOCK_SIZE)
+        )
+        logger.info(f"Loaded {table.num_rows} records from NDJSON: {filepath}")
+        return table
+    
     def export_to_csv(
         self,
         data: List[Dict[str, Any]],
         filename: Optional[str] = None,
-        delimiter: str = ","
+        delimiter: str = ",",
+        sort_columns: bool = False
     ) -> str:
         """
         Export data to CSV file.
@@ -75,6 +230,7 @@ class ExportSystem:
             data: List of dictionaries to export
             filename: Output filename (auto-generated if None)
             delimiter: CSV delimiter
+            sort_columns: Sort header columns instead of first-seen order
             
         Returns:
             Path to exported file
@@ -87,21 +243,31 @@ class ExportSystem:
             filename = f"export_{timestamp}.csv"
         
         filepath = self.output_dir / filename
-        
-        # Get all unique keys from all records
-        fieldnames = set()
-        for record in data:
-            fieldnames.update(record.keys())
-        fieldnames = sorted(list(fieldnames))
-        
-        with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=delimiter)
-            writer.writeheader()
-            writer.writerows(data)
+        fieldnames = _fieldnames(data, sort_columns)
+        self._write_csv(data, _try_arrow_table(data, fieldnames), fieldnames, filepath, delimiter)
         
         logger.info(f"Exported {len(data)} records to CSV: {filepath}")
         return str(filepath)
     
+    def _write_csv(
+        self,
+        data: List[Dict[str, Any]],
+        table: Optional["pa.Table"],
+        fieldnames: List[str],
+        filepath: Path,
+        delimiter: str = ","
+    ):
+        """Write CSV with Arrow's writer, so every record set gets the same formatting."""
+        if table is None or any(pa.types.is_nested(field.type) for field in table.schema):
+            table = _csv_table(data, fieldnames)
+        
+        # Columnar write in Arrow's native CSV writer; sparse keys become nulls
+        pacsv.write_csv(
+            table,
+            str(filepath),
+            write_options=pacsv.WriteOptions(include_header=True, delimiter=delimiter)
+        )
+    
     def export_to_excel(
         self,
         data: List[Dict[str, Any]],
@@ -125,16 +291,67 @@ class ExportSystem:
         
         filepath = self.output_dir / filename
         
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
+        # Imported here so JSON/CSV-only callers skip the pandas start-up cost
+        import pandas as pd
         
-        # Write to Excel
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+        # Known column list spares pandas its own key union over the records
+        df = pd.DataFrame.from_records(data, columns=_fieldnames(data))
+        
+        # constant_memory streams rows to disk instead of holding a cell object per
+        # value; scrape dumps need no formulas or formatting, so it is always safe
+        with pd.ExcelWriter(
+            filepath,
+            engine='xlsxwriter',
+            engine_kwargs={'options': {'constant_memory': True}}
+        ) as writer:
             df.to_excel(writer, sheet_name=sheet_name, index=False)
         
         logger.info(f"Exported {len(data)} records to Excel: {filepath}")
         return str(filepath)
     
+    def export_to_parquet(
+        self,
+        data: Union[List[Dict[str, Any]], Dict[str, List[Any]]],
+        filename: Optional[str] = None,
+        compression: str = "snappy"
+    ) -> str:
+        """
+        Export data to Parquet file.
+        
+        Args:
+            data: List of dictionaries, or columnar {column: values} dict
+                (e.g. from DOMParser.extract_attributes_columnar)
+            filename: Output filename (auto-generated if None)
+            compression: Parquet compression codec
+            
+        Returns:
+            Path to exported file
+        """
+        if not data:
+            raise ValueError("No data to export")
+        
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"export_{timestamp}.parquet"
+        
+        filepath = self.output_dir / filename
+        
+        if isinstance(data, dict):
+            # Already columnar; no per-record transposition needed
+            table = pa.table(data)
+        else:
+            table = _arrow_table(data, _fieldnames(data))
+        self._write_parquet(table, filepath, compression)
+        
+        logger.info(f"Exported {table.num_rows} records to Parquet: {filepath}")
+        return str(filepath)
+    
+    @staticmethod
+    def _write_parquet(table: "pa.Table", filepath: Path, compression: str = "snappy"):
+        """Write an Arrow table to Parquet."""
+        # Dictionary encoding collapses repeated sources, domains and titles
+        pq.write_table(table, str(filepath), compression=compression, use_dictionary=True)
+    
     def export_to_sql(
         self,
         data: List[Dict[str, Any]],
@@ -154,36 +371,113 @@ class ExportSystem:
         Returns:
             Database path
         """
+        # Same column order as the CSV export
+        columns = _fieldnames(data)
+        arrow_table = _try_arrow_table(data, columns) if adbc_sqlite is not None and data else None
+        return self._write_sql(data, columns, arrow_table, db_path, table_name, if_exists)
+    
+    def _write_sql(
+        self,
+        data: List[Dict[str, Any]],
+        columns: List[str],
+        arrow_table: Optional["pa.Table"],
+        db_path: str,
+        table_name: str = "exported_data",
+        if_exists: str = "replace"
+    ) -> str:
+        """Write records to SQLite, over ADBC when an ingestible Arrow table is given."""
         if not data:
             raise ValueError("No data to export")
+        if if_exists not in ("replace", "append", "fail"):
+            raise ValueError(f"Invalid if_exists value: {if_exists}")
+        
+        # Nested or mixed values go through the sqlite3 path, which stores them as JSON text
+        if (
+            adbc_sqlite is not None
+            and arrow_table is not None
+            and all(_is_sqlite_arrow_type(f.type) for f in arrow_table.schema)
+        ):
+            return self._ingest_sql_arrow(arrow_table, db_path, table_name, if_exists)
         
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
+        table = _quote_identifier(table_name)
+        column_defs = ", ".join(
+            f"{_quote_identifier(c)} {_sqlite_type(data, c)}" for c in columns
+        )
+        insert_sql = (
+            f"INSERT INTO {table} ({', '.join(_quote_identifier(c) for c in columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        
+        import sqlite3
         
         # Connect to SQLite
         conn = sqlite3.connect(db_path)
         
         try:
-            # Export to SQL
-            df.to_sql(table_name, conn, if_exists=if_exists, index=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+            ).fetchone() is not None
+            if exists and if_exists == "fail":
+                raise ValueError(f"Table '{table_name}' already exists")
+            
+            # One transaction for the whole export
+            with conn:
+                if exists and if_exists == "replace":
+                    conn.execute(f"DROP TABLE {table}")
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({column_defs})")
+                
+                for start in range(0, len(data), SQL_BATCH_SIZE):
+                    conn.executemany(insert_sql, (
+                        [_sqlite_value(record.get(c)) for c in columns]
+                        for record in data[start:start + SQL_BATCH_SIZE]
+                    ))
+            
             logger.info(f"Exported {len(data)} records to SQL table '{table_name}': {db_path}")
         finally:
             conn.close()
         
         return db_path
     
-    def export_to_multiple_formats(
+    @staticmethod
+    def _ingest_sql_arrow(
+        arrow_table: "pa.Table",
+        db_path: str,
+        table_name: str,
+        if_exists: str
+    ) -> str:
+        """Bulk-load an Arrow table into SQLite over ADBC, without per-row Python work."""
+        with adbc_sqlite.connect(db_path) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+                )
+                if cursor.fetchone() is not None and if_exists == "fail":
+                    raise ValueError(f"Table '{table_name}' already exists")
+                
+                mode = "replace" if if_exists == "replace" else "create_append"
+                cursor.adbc_ingest(table_name, arrow_table, mode=mode)
+            conn.commit()
+        
+        logger.info(f"Exported {arrow_table.num_rows} records to SQL table '{table_name}' via ADBC: {db_path}")
+        return db_path
+    
+    def export_all(
         self,
-        data: List[Dict[str, Any]],
+        data: Union[List[Dict[str, Any]], "pa.Table"],
         formats: List[str],
         base_filename: Optional[str] = None
     ) -> Dict[str, str]:
         """
-        Export data to multiple formats at once.
+        Export data to several formats, building the Arrow table only once.
+        CSV, Parquet and SQL are written from the shared table; the other
+        formats serialize the records directly.
         
         Args:
-            data: List of dictionaries to export
-            formats: List of formats ("json", "csv", "excel", "sql")
+            data: List of dictionaries, or an Arrow table (e.g. from load_ndjson)
+            formats: List of formats ("json", "ndjson", "csv", "excel", "parquet", "sql")
             base_filename: Base filename (without extension)
             
         Returns:
@@ -193,19 +487,46 @@ class ExportSystem:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             base_filename = f"export_{timestamp}"
         
+        if isinstance(data, pa.Table):
+            table = data
+            fieldnames = table.column_names
+            # Parquet is written from the table alone; other formats need records
+            data = table.to_pylist() if any(fmt != "parquet" for fmt in formats) else []
+        else:
+            fieldnames = _fieldnames(data)
+            table = None
+            if data and any(fmt in ("csv", "parquet", "sql") for fmt in formats):
+                table = _try_arrow_table(data, fieldnames)
+        
         results = {}
         
         for fmt in formats:
             try:
                 if fmt == "json":
                     results["json"] = self.export_to_json(data, f"{base_filename}.json")
+                elif fmt == "ndjson":
+                    results["ndjson"] = self.export_to_ndjson(data, f"{base_filename}.ndjson")
                 elif fmt == "csv":
-                    results["csv"] = self.export_to_csv(data, f"{base_filename}.csv")
+                    if not data:
+                        raise ValueError("No data to export")
+                    filepath = self.output_dir / f"{base_filename}.csv"
+                    self._write_csv(data, table, fieldnames, filepath)
+                    logger.info(f"Exported {len(data)} records to CSV: {filepath}")
+                    results["csv"] = str(filepath)
                 elif fmt == "excel":
                     results["excel"] = self.export_to_excel(data, f"{base_filename}.xlsx")
+                elif fmt == "parquet":
+                    if table is None:
+                        # Raises the underlying Arrow conversion error
+                        results["parquet"] = self.export_to_parquet(data, f"{base_filename}.parquet")
+                    else:
+                        filepath = self.output_dir / f"{base_filename}.parquet"
+                        self._write_parquet(table, filepath)
+                        logger.info(f"Exported {table.num_rows} records to Parquet: {filepath}")
+                        results["parquet"] = str(filepath)
                 elif fmt == "sql":
                     db_path = self.output_dir / f"{base_filename}.db"
-                    results["sql"] = self.export_to_sql(data, str(db_path))
+                    results["sql"] = self._write_sql(data, fieldnames, table, str(db_path))
                 else:
                     logger.warning(f"Unknown format: {fmt}")
             except Exception as e:
@@ -213,6 +534,25 @@ class ExportSystem:
         
         return results
     
+    def export_to_multiple_formats(
+        self,
+        data: Union[List[Dict[str, Any]], "pa.Table"],
+        formats: List[str],
+        base_filename: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Export data to multiple formats at once.
+        
+        Args:
+            data: List of dictionaries, or an Arrow table, to export
+            formats: List of formats ("json", "ndjson", "csv", "excel", "parquet", "sql")
+            base_filename: Base filename (without extension)
+            
+        Returns:
+            Dict mapping format to file path
+        """
+        return self.export_all(data, formats, base_filename)
+    
     def export_products(
         self,
         products: List[Dict[str, Any]],
@@ -224,7 +564,7 @@ class ExportSystem:
         
         Args:
             products: List of product dictionaries
-            format: Export format ("json", "csv", "excel", "sql")
+            format: Export format ("json", "ndjson", "csv", "excel", "parquet", "sql")
             filename: Output filename
             
         Returns:
@@ -232,10 +572,14 @@ class ExportSystem:
         """
         if format == "json":
             return self.export_to_json(products, filename)
+        elif format == "ndjson":
+            return self.export_to_ndjson(products, filename)
         elif format == "csv":
             return self.export_to_csv(products, filename)
         elif format == "excel":
             return self.export_to_excel(products, filename)
+        elif format == "parquet":
+            return self.export_to_parquet(products, filename)
         elif format == "sql":
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -263,10 +607,14 @@ class ExportSystem:
         """
         if format == "json":
             return self.export_to_json(price_history, filename)
+        elif format == "ndjson":
+            return self.export_to_ndjson(price_history, filename)
         elif format == "csv":
             return self.export_to_csv(price_history, filename)
         elif format == "excel":
             return self.export_to_excel(price_history, filename)
+        elif format == "parquet":
+            return self.export_to_parquet(price_history, filename)
         elif format == "sql":
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -5,33 +5,69 @@ Handles flexible DOM parsing with XPath, CSS selectors, and BeautifulSoup.
 
 from bs4 import BeautifulSoup, Tag
 from typing import Dict, List, Optional, Any, Union
+from functools import lru_cache
 from loguru import logger
+import copy
 import re
+import orjson
 from lxml import etree
 
 
+_WS_RE = re.compile(r'\s+')
+_DBL_NL_RE = re.compile(r'\n\s*\n')
+# Text searches bind the needle as an XPath variable, so no escaping is needed
+_TEXT_CONTAINS_XPATH = etree.XPath("//text()[contains(., $t)]")
+_TEXT_EQUALS_XPATH = etree.XPath("//text()[. = $t]")
+_JSON_LD_XPATH = etree.XPath("//script[@type='application/ld+json']")
+_BODY_TEXT_XPATH = etree.XPath("//body//text()[not(ancestor::script or ancestor::style)]")
+
+
+@lru_cache(maxsize=256)
+def _compile_xpath(xpath: str) -> etree.XPath:
+    """Compile an XPath expression once and reuse it across documents."""
+    return etree.XPath(xpath)
+
+
+@lru_cache(maxsize=256)
+def _compile_text_pattern(text: str, exact: bool) -> "re.Pattern":
+    """Compile a literal text search pattern once per (text, exact) pair."""
+    escaped = re.escape(text)
+    return re.compile(f"^{escaped}$" if exact else escaped)
+
+
 class DOMParser:
     """
     Flexible DOM parsing engine supporting multiple selector types.
     """
     
-    def __init__(self, html: str, parser: str = "html.parser"):
+    def __init__(self, html: str, parser: str = "lxml"):
         """
         Initialize parser with HTML content.
         
         Args:
             html: HTML content to parse
-            parser: Parser type ("html.parser", "lxml", "html5lib")
+            parser: Parser type ("lxml", "html.parser", "html5lib")
         """
         self.soup = BeautifulSoup(html, parser)
         self.html = html
-        
-        # Create lxml tree for XPath support
-        try:
-            self.lxml_tree = etree.HTML(html)
-        except Exception as e:
-            logger.warning(f"Failed to create lxml tree: {e}")
-            self.lxml_tree = None
+        self._lxml_tree = None
+        self._lxml_html = None
+    
+    @property
+    def lxml_tree(self):
+        """lxml tree for XPath support, parsed on first use and again if html changes."""
+        if self._lxml_html is not self.html:
+            self._lxml_html = self.html
+            try:
+                try:
+                    self._lxml_tree = etree.HTML(self.html)
+                except ValueError:
+                    # Strings with an XML encoding declaration must be parsed as bytes
+                    self._lxml_tree = etree.HTML(self.html.encode("utf-8"))
+            except Exception as e:
+                logger.warning(f"Failed to create lxml tree: {e}")
+                self._lxml_tree = None
+        return self._lxml_tree
     
     def find_by_css(self, selector: str, first: bool = False) -> Union[List[Tag], Tag, None]:
         """
@@ -61,12 +97,12 @@ class DOMParser:
         Returns:
             List of elements or single element
         """
-        if not self.lxml_tree:
+        if self.lxml_tree is None:
             logger.error("XPath requires lxml tree, but it's not available")
             return None
         
         try:
-            elements = self.lxml_tree.xpath(xpath)
+            elements = _compile_xpath(xpath)(self.lxml_tree)
             
             if first:
                 return elements[0] if elements else None
@@ -75,21 +111,24 @@ class DOMParser:
             logger.error(f"XPath error: {e}")
             return None
     
-    def find_by_text(self, text: str, exact: bool = False) -> List[Tag]:
+    def find_by_text(self, text: str, exact: bool = False) -> List[str]:
         """
-        Find elements containing specific text.
+        Find text nodes containing specific text.
         
         Args:
             text: Text to search for
             exact: Exact match (True) or contains (False)
             
         Returns:
-            List of matching elements
+            List of matching text nodes
         """
-        if exact:
-            return self.soup.find_all(string=re.compile(f"^{re.escape(text)}$"))
-        else:
-            return self.soup.find_all(string=re.compile(re.escape(text)))
+        tree = self.lxml_tree
+        if tree is None:
+            # Fall back to BeautifulSoup if lxml could not parse the page
+            return self.soup.find_all(string=_compile_text_pattern(text, exact))
+        
+        xpath = _TEXT_EQUALS_XPATH if exact else _TEXT_CONTAINS_XPATH
+        return xpath(tree, t=text)
     
     def extract_text(self, selector: Optional[str] = None, clean: bool = True) -> str:
         """
@@ -106,13 +145,13 @@ class DOMParser:
             elements = self.find_by_css(selector)
             if not elements:
                 return ""
-            text = " ".join([elem.get_text() for elem in elements])
+            text = " ".join(elem.get_text() for elem in elements)
         else:
             text = self.soup.get_text()
         
         if clean:
             # Clean up whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
+            text = _WS_RE.sub(' ', text).strip()
         
         return text
     
@@ -138,6 +177,28 @@ class DOMParser:
         
         return results
     
+    def extract_attributes_columnar(self, selector: str, attributes: List[str]) -> Dict[str, List[str]]:
+        """
+        Extract specific attributes from elements as columns.
+        One list per attribute instead of one dict per element; the result
+        can be passed straight to ExportSystem.export_to_parquet.
+        
+        Args:
+            selector: CSS selector
+            attributes: List of attribute names to extract
+            
+        Returns:
+            Dict mapping each attribute to its values, in element order
+        """
+        elements = self.find_by_css(selector)
+        columns = {attr: [] for attr in attributes}
+        
+        for elem in elements:
+            for attr, values in columns.items():
+                values.append(elem.get(attr, ""))
+        
+        return columns
+    
     def extract_links(self, base_url: Optional[str] = None) -> List[Dict[str, str]]:
         """
         Extract all links from the page.
@@ -148,7 +209,16 @@ class DOMParser:
         Returns:
             List of dicts with 'url' and 'text'
         """
-        links = self.find_by_css("a")
+        tree = self.lxml_tree
+        if tree is None:
+            # Fall back to BeautifulSoup if lxml could not parse the page
+            links = self.find_by_css("a")
+            get_text = lambda link: link.get_text(strip=True)
+        else:
+            # lxml attribute access goes straight to libxml2
+            links = tree.iter("a")
+            get_text = lambda link: "".join(link.itertext()).strip()
+        
         results = []
         
         for link in links:
@@ -158,7 +228,7 @@ class DOMParser:
             
             results.append({
                 "url": href,
-                "text": link.get_text(strip=True),
+                "text": get_text(link),
                 "title": link.get("title", "")
             })
         
@@ -174,7 +244,10 @@ class DOMParser:
         Returns:
             List of dicts with 'src', 'alt', 'title'
         """
-        images = self.find_by_css("img")
+        tree = self.lxml_tree
+        # Fall back to BeautifulSoup if lxml could not parse the page
+        images = self.find_by_css("img") if tree is None else tree.iter("img")
+        
         results = []
         
         for img in images:
@@ -221,13 +294,18 @@ class DOMParser:
         structured_data = []
         
         # Extract JSON-LD
-        json_ld_scripts = self.find_by_css("script[type='application/ld+json']")
-        for script in json_ld_scripts:
+        tree = self.lxml_tree
+        if tree is None:
+            # Fall back to BeautifulSoup if lxml could not parse the page
+            json_ld_texts = [s.string for s in self.find_by_css("script[type='application/ld+json']")]
+        else:
+            json_ld_texts = [s.text for s in _JSON_LD_XPATH(tree)]
+        
+        for text in json_ld_texts:
             try:
-                import json
-                data = json.loads(script.string)
+                data = orjson.loads(text or "")
                 structured_data.append({"type": "json-ld", "data": data})
-            except Exception as e:
+            except orjson.JSONDecodeError as e:
                 logger.debug(f"Failed to parse JSON-LD: {e}")
         
         return structured_data
@@ -243,17 +321,22 @@ class DOMParser:
         Returns:
             Cleaned HTML string
         """
-        soup = self.soup.__copy__()
+        if self.lxml_tree is None:
+            return ""
         
-        if remove_scripts:
-            for script in soup(["script"]):
-                script.decompose()
+        # Copy the C-level tree (keeping any doctype) rather than the bs4 object graph
+        tree = copy.deepcopy(self.lxml_tree.getroottree())
         
+        tags = []
+        if remove_scripts:
+            tags.append("script")
         if remove_styles:
-            for style in soup(["style"]):
-                style.decompose()
+            tags.append("style")
+        if tags:
+            # Text following a removed tag is kept
+            etree.strip_elements(tree, *tags, with_tail=False)
         
-        return str(soup)
+        return etree.tostring(tree, encoding="unicode", method="html")
     
     def get_body_text(self, separator: str = "\n") -> str:
         """
@@ -265,17 +348,14 @@ class DOMParser:
         Returns:
             Cleaned text content
         """
-        body = self.soup.find("body")
-        if not body:
+        if self.lxml_tree is None:
             return ""
         
-        # Remove scripts and styles
-        for tag in body(["script", "style"]):
-            tag.decompose()
-        
-        text = body.get_text(separator=separator, strip=True)
+        # Text nodes outside scripts and styles, selected in C without touching the tree
+        strings = (s.strip() for s in _BODY_TEXT_XPATH(self.lxml_tree))
+        text = separator.join(s for s in strings if s)
         # Clean up multiple newlines
-        text = re.sub(r'\n\s*\n', '\n', text)
+        text = _DBL_NL_RE.sub('\n', text)
         
         return text
 
@@ -3,12 +3,81 @@ Plugin System Module
 Allows custom extractors for specific websites and rule-based scraping templates.
 """
 
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from abc import ABC, abstractmethod
 from loguru import logger
-import importlib
+from lxml import etree
+from lxml.cssselect import CSSSelector
+import importlib.util
 import inspect
+import re
 from pathlib import Path
+from urllib.parse import urlsplit
+
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+
+class _Selector:
+    """CSS selector compiled for lxml, keeping the source for selectolax."""
+    
+    __slots__ = ("css", "compiled")
+    
+    def __init__(self, css: str):
+        self.css = css
+        # Compiled to XPath once and reused for every page
+        self.compiled = CSSSelector(css)
+
+
+_AMAZON_TITLE = _Selector("#productTitle")
+_AMAZON_PRICE = _Selector(".a-price-whole, .a-offscreen")
+_AMAZON_RATING = _Selector("#acrPopover .a-icon-alt")
+_AMAZON_AVAILABILITY = _Selector("#availability span")
+_FLIPKART_TITLE = _Selector("span.B_NuCI")
+_FLIPKART_PRICE = _Selector("div._30jeq3._16Jk6d")
+_FLIPKART_RATING = _Selector("div._3LWZlK")
+
+# Numbers must start with a digit so a stray comma is not taken as a price
+_PRICE_RE = re.compile(r'\d[\d,]*\.?\d*')
+_INT_PRICE_RE = re.compile(r'\d[\d,]*')
+_RATING_RE = re.compile(r'(\d+\.?\d*)')
+
+
+def _parse_price(text: str, allow_fraction: bool = True) -> Optional[float]:
+    """First number in a price string with commas removed, or None."""
+    price_match = (_PRICE_RE if allow_fraction else _INT_PRICE_RE).search(text)
+    if price_match:
+        return float(price_match.group().replace(',', ''))
+    return None
+
+
+def _parse_html(html: str):
+    """Parse HTML with selectolax (Lexbor) when installed, else lxml (None for empty documents)."""
+    if LexborHTMLParser is not None:
+        return LexborHTMLParser(html)
+    try:
+        return etree.HTML(html)
+    except ValueError:
+        # Strings with an XML encoding declaration must be parsed as bytes
+        return etree.HTML(html.encode("utf-8"))
+
+
+def _select_text(tree, selector: _Selector) -> Optional[str]:
+    """Whitespace-normalized text of the first element matching a selector."""
+    if tree is None:
+        return None
+    
+    if LexborHTMLParser is not None:
+        node = tree.css_first(selector.css)
+        text = node.text() if node is not None else None
+    else:
+        elements = selector.compiled(tree)
+        text = elements[0].xpath("string()") if elements else None
+    
+    return " ".join(text.split()) if text is not None else None
 
 
 class BaseExtractor(ABC):
@@ -17,6 +86,10 @@ class BaseExtractor(ABC):
     All extractors should inherit from this class.
     """
     
+    # Hosts handled by this extractor (subdomains included); lets the plugin
+    # manager skip its can_handle for URLs on other hosts
+    domains: Tuple[str, ...] = ()
+    
     @abstractmethod
     def extract(self, html: str, url: str) -> Dict[str, Any]:
         """
@@ -64,6 +137,10 @@ class PluginManager:
         self.plugins_dir = Path(plugins_dir)
         self.plugins_dir.mkdir(parents=True, exist_ok=True)
         self.extractors: List[BaseExtractor] = []
+        # Domain -> (registration index, extractor), plus extractors that only
+        # implement can_handle; indices keep registration order across both
+        self._domain_map: Dict[str, List[Tuple[int, BaseExtractor]]] = {}
+        self._undomained: List[Tuple[int, BaseExtractor]] = []
         self.templates: Dict[str, Dict[str, Any]] = {}
         logger.info(f"Plugin manager initialized with plugins directory: {plugins_dir}")
     
@@ -77,7 +154,13 @@ class PluginManager:
         if not isinstance(extractor, BaseExtractor):
             raise ValueError("Extractor must inherit from BaseExtractor")
         
+        entry = (len(self.extractors), extractor)
         self.extractors.append(extractor)
+        if extractor.domains:
+            for domain in extractor.domains:
+                self._domain_map.setdefault(domain.lower(), []).append(entry)
+        else:
+            self._undomained.append(entry)
         logger.info(f"Registered extractor: {extractor.get_name()}")
     
     def load_plugins_from_directory(self):
@@ -127,7 +210,17 @@ class PluginManager:
         Returns:
             Extractor instance or None
         """
-        for extractor in self.extractors:
+        # Extractors for the host or a parent domain (www.amazon.in -> amazon.in -> in);
+        # those declaring other domains cannot handle the URL and are skipped
+        candidates = list(self._undomained)
+        host = urlsplit(url).hostname or ""
+        while host:
+            candidates.extend(self._domain_map.get(host, ()))
+            host = host.partition(".")[2]
+        
+        # First registered wins, as with a scan over every extractor; plugins
+        # loaded before the built-in extractors therefore take priority
+        for _, extractor in sorted(candidates, key=lambda entry: entry[0]):
             if extractor.can_handle(url):
                 return extractor
         return None
@@ -164,12 +257,13 @@ class PluginManager:
 class AmazonExtractor(BaseExtractor):
     """Example extractor for Amazon product pages."""
     
+    domains = ("amazon.com", "amazon.in")
+    
     def can_handle(self, url: str) -> bool:
         return "amazon.com" in url or "amazon.in" in url
     
     def extract(self, html: str, url: str) -> Dict[str, Any]:
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, 'html.parser')
+        tree = _parse_html(html)
         
         data = {
             "url": url,
@@ -177,33 +271,29 @@ class AmazonExtractor(BaseExtractor):
         }
         
         # Extract title
-        title_elem = soup.select_one("#productTitle")
-        if title_elem:
-            data["title"] = title_elem.get_text(strip=True)
+        title_text = _select_text(tree, _AMAZON_TITLE)
+        if title_text is not None:
+            data["title"] = title_text
         
         # Extract price
-        price_elem = soup.select_one(".a-price-whole, .a-offscreen")
-        if price_elem:
-            price_text = price_elem.get_text(strip=True)
+        price_text = _select_text(tree, _AMAZON_PRICE)
+        if price_text is not None:
             # Remove currency symbols and convert to float
-            import re
-            price_match = re.search(r'[\d,]+\.?\d*', price_text)
-            if price_match:
-                data["price"] = float(price_match.group().replace(',', ''))
+            price = _parse_price(price_text)
+            if price is not None:
+                data["price"] = price
         
         # Extract rating
-        rating_elem = soup.select_one("#acrPopover .a-icon-alt")
-        if rating_elem:
-            rating_text = rating_elem.get_text(strip=True)
-            import re
-            rating_match = re.search(r'(\d+\.?\d*)', rating_text)
+        rating_text = _select_text(tree, _AMAZON_RATING)
+        if rating_text is not None:
+            rating_match = _RATING_RE.search(rating_text)
             if rating_match:
                 data["rating"] = float(rating_match.group(1))
         
         # Extract availability
-        availability_elem = soup.select_one("#availability span")
-        if availability_elem:
-            avail_text = availability_elem.get_text(strip=True).lower()
+        avail_text = _select_text(tree, _AMAZON_AVAILABILITY)
+        if avail_text is not None:
+            avail_text = avail_text.lower()
             data["availability"] = "in stock" in avail_text or "available" in avail_text
         
         return data
@@ -212,12 +302,13 @@ class AmazonExtractor(BaseExtractor):
 class FlipkartExtractor(BaseExtractor):
     """Example extractor for Flipkart product pages."""
     
+    domains = ("flipkart.com",)
+    
     def can_handle(self, url: str) -> bool:
         return "flipkart.com" in url
     
     def extract(self, html: str, url: str) -> Dict[str, Any]:
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, 'html.parser')
+        tree = _parse_html(html)
         
         data = {
             "url": url,
@@ -225,30 +316,23 @@ class FlipkartExtractor(BaseExtractor):
         }
         
         # Extract title
-        title_elem = soup.select_one("span.B_NuCI")
-        if title_elem:
-            data["title"] = title_elem.get_text(strip=True)
+        title_text = _select_text(tree, _FLIPKART_TITLE)
+        if title_text is not None:
+            data["title"] = title_text
         
         # Extract price
-        price_elem = soup.select_one("div._30jeq3._16Jk6d")
-        if price_elem:
-            price_text = price_elem.get_text(strip=True)
-            import re
-            price_match = re.search(r'[\d,]+', price_text)
-            if price_match:
-                data["price"] = float(price_match.group().replace(',', ''))
+        price_text = _select_text(tree, _FLIPKART_PRICE)
+        if price_text is not None:
+            price = _parse_price(price_text, allow_fraction=False)
+            if price is not None:
+                data["price"] = price
         
         # Extract rating
-        rating_elem = soup.select_one("div._3LWZlK")
-        if rating_elem:
+        rating_text = _select_text(tree, _FLIPKART_RATING)
+        if rating_text is not None:
             try:
-                data["rating"] = float(rating_elem.get_text(strip=True))
+                data["rating"] = float(rating_text)
             except ValueError:
                 pass
         
         return data
-
-
-# Import importlib.util for plugin loading
-import importlib.util
-
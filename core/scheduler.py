@@ -3,13 +3,17 @@ Scheduler Module
 Handles automated scraping jobs with cron-based scheduling.
 """
 
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Mapping
+from types import MappingProxyType
 from datetime import datetime, timedelta
 from loguru import logger
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.date import DateTrigger
+import asyncio
+import inspect
 import time
 
 
@@ -17,10 +21,22 @@ class ScrapingScheduler:
     """
     Scheduler for automated scraping jobs.
     Supports hourly, daily, monthly, and custom cron schedules.
+    
+    Created inside a running event loop (e.g. a FastAPI startup handler) it
+    schedules on that loop, so async callbacks are awaited without a thread
+    per job; otherwise jobs run on a background thread pool.
     """
     
-    def __init__(self):
-        self.scheduler = BackgroundScheduler()
+    def __init__(self, event_loop: Optional[asyncio.AbstractEventLoop] = None):
+        if event_loop is None:
+            try:
+                event_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+        if event_loop is not None:
+            self.scheduler = AsyncIOScheduler(event_loop=event_loop)
+        else:
+            self.scheduler = BackgroundScheduler()
         self.scheduler.start()
         self.jobs = {}  # job_id -> job_info
         self.job_callbacks = {}  # job_id -> callback function
@@ -93,15 +109,33 @@ class ScrapingScheduler:
             raise ValueError(f"Unknown schedule_type: {schedule_type}")
         
         # Create wrapper function to log and handle errors
-        def job_wrapper():
-            try:
-                logger.info(f"Running scheduled job: {job_id}")
-                result = callback(**kwargs)
-                logger.info(f"Job {job_id} completed successfully")
-                return result
-            except Exception as e:
-                logger.error(f"Job {job_id} failed: {e}")
-                raise
+        if isinstance(self.scheduler, AsyncIOScheduler):
+            async def job_wrapper():
+                try:
+                    logger.info(f"Running scheduled job: {job_id}")
+                    if inspect.iscoroutinefunction(callback):
+                        result = await callback(**kwargs)
+                    else:
+                        # Blocking scrapes must not stall the event loop
+                        result = await asyncio.to_thread(callback, **kwargs)
+                    logger.info(f"Job {job_id} completed successfully")
+                    return result
+                except Exception as e:
+                    logger.error(f"Job {job_id} failed: {e}")
+                    raise
+        else:
+            def job_wrapper():
+                try:
+                    logger.info(f"Running scheduled job: {job_id}")
+                    result = callback(**kwargs)
+                    if inspect.isawaitable(result):
+                        # Async callbacks get their own loop on the worker thread
+                        result = asyncio.run(result)
+                    logger.info(f"Job {job_id} completed successfully")
+                    return result
+                except Exception as e:
+                    logger.error(f"Job {job_id} failed: {e}")
+                    raise
         
         # Schedule the job
         scheduled_job = self.scheduler.add_job(
@@ -116,7 +150,7 @@ class ScrapingScheduler:
             "schedule_type": schedule_type,
             "trigger": str(trigger),
             "created_at": datetime.now(),
-            "next_run": scheduled_job.next_run_time
+            "next_run": scheduled_job.next_run_time.isoformat() if scheduled_job.next_run_time else None
         }
         
         self.job_callbacks[job_id] = callback
@@ -184,10 +218,14 @@ class ScrapingScheduler:
                 del self.job_callbacks[job_id]
             logger.info(f"Removed job: {job_id}")
     
-    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
-        """Get job information."""
+    def get_job(self, job_id: str) -> Optional[Mapping[str, Any]]:
+        """
+        Get job information.
+        Returns a read-only view of the job record, refreshed in place with
+        the scheduler's run times, so polling does not copy it per call.
+        """
         if job_id in self.jobs:
-            job_info = self.jobs[job_id].copy()
+            job_info = self.jobs[job_id]
             try:
                 scheduled_job = self.scheduler.get_job(job_id)
                 if scheduled_job:
@@ -195,7 +233,7 @@ class ScrapingScheduler:
                     job_info["previous_run"] = scheduled_job.trigger.get_next_fire_time(None, datetime.now()).isoformat() if hasattr(scheduled_job.trigger, 'get_next_fire_time') else None
             except Exception as e:
                 logger.debug(f"Error getting job details: {e}")
-            return job_info
+            return MappingProxyType(job_info)
         return None
     
     def list_jobs(self) -> List[Dict[str, Any]]:
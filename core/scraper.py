@@ -5,24 +5,95 @@ Handles request management, automatic mode-switching, and flexible scraping pipe
 
 import requests
 import cloudscraper
+from requests.adapters import HTTPAdapter
 from typing import Dict, Optional, Any, List
+from collections import OrderedDict
+from urllib.parse import urlsplit
 from loguru import logger
+import asyncio
+import threading
 from .browser import BrowserManager
 from .anti_block import AntiBlockEngine
 
 
+# Host pools and connections per host kept by each HTTP session
+DEFAULT_POOL_SIZE = 64
+
+# Methods tried by auto mode, cheapest first
+AUTO_METHODS = ("requests", "cloudscraper", "browser")
+# Hosts whose last successful auto method is remembered (LRU)
+HOST_METHOD_CACHE_SIZE = 1024
+# Consecutive failures before a remembered method is forgotten
+HOST_METHOD_MAX_FAILURES = 3
+
+
+def _resize_connection_pools(session: requests.Session, pool_size: int):
+    """Resize the connection pools of a session's mounted adapters in place."""
+    for adapter in session.adapters.values():
+        if isinstance(adapter, HTTPAdapter):
+            # Re-initialising keeps adapter settings such as cloudscraper's TLS cipher suite
+            adapter.init_poolmanager(pool_size, pool_size)
+
+
+def _response_html(response: requests.Response) -> str:
+    """Decode a response body once, without requests' charset detection pass."""
+    if response.encoding is None:
+        # No charset in Content-Type: requests would run charset detection over
+        # the whole body, but nearly every page is UTF-8 (or declares it inline)
+        try:
+            return response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+    return response.text
+
+
 class UniversalScraper:
     """
     Universal scraper with automatic mode-switching:
     requests → cloudscraper → Playwright/Selenium
     """
     
-    def __init__(self, use_browser: bool = False, anti_block: Optional[AntiBlockEngine] = None):
+    # Fixed attribute layout; scrapers are long-lived and hit per request
+    __slots__ = (
+        "use_browser", "anti_block", "_browser_manager", "_browser_lock",
+        "_host_methods", "_host_methods_lock", "session", "cloudscraper_session",
+        "_methods"
+    )
+    
+    def __init__(
+        self,
+        use_browser: bool = False,
+        anti_block: Optional[AntiBlockEngine] = None,
+        pool_size: int = DEFAULT_POOL_SIZE
+    ):
         self.use_browser = use_browser
         self.anti_block = anti_block or AntiBlockEngine()
-        self.browser_manager = BrowserManager() if use_browser else None
+        self._browser_manager: Optional[BrowserManager] = None
+        self._browser_lock = threading.Lock()
+        # host -> [method that last succeeded, consecutive failures since]
+        self._host_methods: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._host_methods_lock = threading.Lock()
+        # Pools sized for concurrent scraping so connections (and TLS sessions) are reused
         self.session = requests.Session()
+        _resize_connection_pools(self.session, pool_size)
         self.cloudscraper_session = cloudscraper.create_scraper()
+        _resize_connection_pools(self.cloudscraper_session, pool_size)
+        # Method name -> bound scrape function, resolved once per scrape
+        self._methods = {
+            "auto": self._scrape_auto,
+            "requests": self._scrape_requests,
+            "cloudscraper": self._scrape_cloudscraper,
+            "browser": self._scrape_browser
+        }
+    
+    @property
+    def browser_manager(self) -> Optional[BrowserManager]:
+        """Browser manager, created on first use so non-browser scrapes never pay for it."""
+        if self._browser_manager is None and self.use_browser:
+            with self._browser_lock:
+                if self._browser_manager is None:
+                    self._browser_manager = BrowserManager()
+        return self._browser_manager
         
     def scrape(
         self,
@@ -47,21 +118,16 @@ class UniversalScraper:
         Returns:
             Dict with 'html', 'status_code', 'method_used', 'headers'
         """
-        headers = headers or {}
-        headers.update(self.anti_block.get_headers())
+        scrape_method = self._methods.get(method)
+        if scrape_method is None:
+            raise ValueError(f"Unknown method: {method}")
+        
+        # One merge per scrape, shared by every retry; custom headers win over rotated ones
+        headers = {**self.anti_block.get_headers(), **(headers or {})}
         
         for attempt in range(retries):
             try:
-                if method == "auto":
-                    result = self._scrape_auto(url, headers, timeout, **kwargs)
-                elif method == "requests":
-                    result = self._scrape_requests(url, headers, timeout, **kwargs)
-                elif method == "cloudscraper":
-                    result = self._scrape_cloudscraper(url, headers, timeout, **kwargs)
-                elif method == "browser":
-                    result = self._scrape_browser(url, headers, timeout, **kwargs)
-                else:
-                    raise ValueError(f"Unknown method: {method}")
+                result = scrape_method(url, headers, timeout, **kwargs)
                 
                 logger.info(f"Successfully scraped {url} using {result['method_used']}")
                 return result
@@ -74,25 +140,85 @@ class UniversalScraper:
         
         raise Exception(f"Failed to scrape {url} after {retries} attempts")
     
+    async def scrape_async(
+        self,
+        url: str,
+        method: str = "auto",
+        headers: Optional[Dict] = None,
+        timeout: int = 30,
+        retries: int = 3,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Awaitable version of scrape() for use from async code.
+        The HTTP sessions are blocking, so the scrape runs in a worker thread
+        and the event loop stays free while it waits.
+        
+        Returns:
+            Dict with 'html', 'status_code', 'method_used', 'headers'
+        """
+        return await asyncio.to_thread(
+            self.scrape, url, method, headers, timeout, retries, **kwargs
+        )
+    
     def _scrape_auto(self, url: str, headers: Dict, timeout: int, **kwargs) -> Dict[str, Any]:
-        """Auto-select best scraping method."""
-        # Try requests first
-        try:
-            return self._scrape_requests(url, headers, timeout, **kwargs)
-        except Exception as e:
-            logger.debug(f"Requests failed, trying cloudscraper: {e}")
+        """
+        Auto-select best scraping method.
+        Starts with the method that last worked for the host, then falls back
+        through requests -> cloudscraper -> browser.
+        """
+        host = urlsplit(url).netloc.lower()
+        cached_method = self._get_host_method(host)
+        methods = AUTO_METHODS
+        if cached_method is not None:
+            methods = (cached_method,) + tuple(m for m in AUTO_METHODS if m != cached_method)
         
-        # Try cloudscraper
-        try:
-            return self._scrape_cloudscraper(url, headers, timeout, **kwargs)
-        except Exception as e:
-            logger.debug(f"Cloudscraper failed, trying browser: {e}")
+        last_error: Optional[Exception] = None
+        for method in methods:
+            if method == "browser" and not self.use_browser:
+                continue
+            try:
+                result = self._methods[method](url, headers, timeout, **kwargs)
+            except Exception as e:
+                logger.debug(f"{method} failed for {url}: {e}")
+                if method == cached_method:
+                    self._record_host_failure(host)
+                last_error = e
+                continue
+            
+            self._remember_host_method(host, method)
+            return result
         
-        # Fallback to browser
-        if self.browser_manager:
-            return self._scrape_browser(url, headers, timeout, **kwargs)
-        else:
-            raise Exception("All scraping methods failed and browser not available")
+        if self.use_browser and last_error is not None:
+            raise last_error
+        raise Exception("All scraping methods failed and browser not available")
+    
+    def _get_host_method(self, host: str) -> Optional[str]:
+        """Method that last succeeded for a host, if remembered."""
+        with self._host_methods_lock:
+            entry = self._host_methods.get(host)
+            if entry is None:
+                return None
+            self._host_methods.move_to_end(host)
+            return entry[0]
+    
+    def _remember_host_method(self, host: str, method: str):
+        """Remember a host's successful method, evicting the least recently used host."""
+        with self._host_methods_lock:
+            self._host_methods[host] = [method, 0]
+            self._host_methods.move_to_end(host)
+            if len(self._host_methods) > HOST_METHOD_CACHE_SIZE:
+                self._host_methods.popitem(last=False)
+    
+    def _record_host_failure(self, host: str):
+        """Count a failure of a host's remembered method; forget it after too many."""
+        with self._host_methods_lock:
+            entry = self._host_methods.get(host)
+            if entry is None:
+                return
+            entry[1] += 1
+            if entry[1] >= HOST_METHOD_MAX_FAILURES:
+                del self._host_methods[host]
     
     def _scrape_requests(self, url: str, headers: Dict, timeout: int, **kwargs) -> Dict[str, Any]:
         """Scrape using requests library."""
@@ -100,7 +226,7 @@ class UniversalScraper:
         response.raise_for_status()
         
         return {
-            "html": response.text,
+            "html": _response_html(response),
             "status_code": response.status_code,
             "method_used": "requests",
             "headers": dict(response.headers),
@@ -113,7 +239,7 @@ class UniversalScraper:
         response.raise_for_status()
         
         return {
-            "html": response.text,
+            "html": _response_html(response),
             "status_code": response.status_code,
             "method_used": "cloudscraper",
             "headers": dict(response.headers),
@@ -137,7 +263,9 @@ class UniversalScraper:
     
     def close(self):
         """Clean up resources."""
-        if self.browser_manager:
-            self.browser_manager.close()
+        if self._browser_manager:
+            self._browser_manager.close()
+            self._browser_manager = None
         self.session.close()
+        self.cloudscraper_session.close()
 
@@ -4,11 +4,108 @@ Supports SQLite (default) with optional MongoDB/PostgreSQL support.
 """
 
 import sqlite3
-import json
-from typing import Dict, List, Optional, Any
-from datetime import datetime
+import threading
+import orjson
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Tuple, Iterator
+from datetime import datetime, timezone
 from pathlib import Path
 from loguru import logger
+import numpy as np
+
+
+# Rows per executemany call in bulk inserts
+BULK_BATCH_SIZE = 10000
+# URLs per "IN (...)" lookup, below SQLite's historical 999-parameter limit
+_IN_CLAUSE_SIZE = 900
+# Compiled statements kept per connection (sqlite3's default is 128), so the
+# per-size IN lookups and history queries do not evict the hot statements
+SQLITE_CACHED_STATEMENTS = 256
+# Stored in PRAGMA user_version once _create_tables has brought a database up
+# to date; bump it whenever the schema or its migrations change
+SCHEMA_VERSION = 1
+
+_PRODUCT_UPSERT_SQL = """
+    INSERT INTO products
+    (url, title, price, brand, rating, availability, description, image_url, source, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(url) DO UPDATE SET
+        title = excluded.title, price = excluded.price, brand = excluded.brand,
+        rating = excluded.rating, availability = excluded.availability,
+        description = excluded.description, image_url = excluded.image_url,
+        source = excluded.source, metadata = excluded.metadata,
+        updated_at = CURRENT_TIMESTAMP
+"""
+# RETURNING (SQLite 3.35+) hands back the row ID of an insert or update alike
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+_PRODUCT_UPSERT_RETURNING_SQL = _PRODUCT_UPSERT_SQL + " RETURNING id"
+
+_PRODUCT_BY_URL_SQL = "SELECT * FROM products WHERE url = ?"
+
+_SCRAPE_JOB_INSERT_SQL = """
+    INSERT INTO scrape_jobs (url, status, method, started_at)
+    VALUES (?, 'pending', ?, CURRENT_TIMESTAMP)
+"""
+
+_SCRAPE_JOB_UPDATE_SQL = """
+    UPDATE scrape_jobs
+    SET status = ?, result = ?, error = ?, completed_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+
+# recorded_at_ts is the same instant as the recorded_at default, as unix seconds
+_PRICE_HISTORY_INSERT_SQL = """
+    INSERT INTO price_history (product_id, price, currency, recorded_at_ts)
+    VALUES (?, ?, ?, CAST(strftime('%s', 'now') AS INTEGER))
+"""
+
+# Running aggregates per product, folded in with each price history row
+_PRICE_STATS_UPSERT_SQL = """
+    INSERT INTO price_stats
+    (product_id, min_price, max_price, sum_price, count, first_price, first_ts, last_price, last_ts)
+    VALUES (?1, ?2, ?2, ?2, 1, ?2, CAST(strftime('%s', 'now') AS INTEGER),
+            ?2, CAST(strftime('%s', 'now') AS INTEGER))
+    ON CONFLICT(product_id) DO UPDATE SET
+        min_price = min(min_price, excluded.min_price),
+        max_price = max(max_price, excluded.max_price),
+        sum_price = sum_price + excluded.sum_price,
+        count = count + 1,
+        -- First and last follow the history order (recorded_at_ts, then id), so
+        -- they agree with the ordered history queries even if the clock steps back
+        first_price = CASE WHEN excluded.first_ts < first_ts THEN excluded.first_price ELSE first_price END,
+        first_ts = min(first_ts, excluded.first_ts),
+        last_price = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_price ELSE last_price END,
+        last_ts = max(last_ts, excluded.last_ts)
+"""
+
+
+def _dumps_json(value: Any) -> str:
+    """Serialize a value for a JSON text column."""
+    # orjson is several times faster than json; keys and numpy values as in exports
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _since_ts(since: datetime) -> int:
+    """Unix seconds for a history cutoff; naive values are UTC, like CURRENT_TIMESTAMP."""
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return int(since.timestamp())
+
+
+def _product_row(product_data: Dict[str, Any]) -> Tuple:
+    """Parameters for _PRODUCT_UPSERT_SQL, in column order."""
+    return (
+        product_data.get("url"),
+        product_data.get("title"),
+        product_data.get("price"),
+        product_data.get("brand"),
+        product_data.get("rating"),
+        product_data.get("availability", False),
+        product_data.get("description"),
+        product_data.get("image_url"),
+        product_data.get("source"),
+        _dumps_json(product_data.get("metadata", {}))
+    )
 
 
 class Database:
@@ -28,6 +125,14 @@ class Database:
         self.db_path = db_path
         self.db_type = db_type
         self.conn: Optional[sqlite3.Connection] = None
+        # Nesting depth of transaction() blocks on self.conn
+        self._transaction_depth = 0
+        # Serializes writers on the shared connection; readers never take it
+        self._write_lock = threading.RLock()
+        # One read-only connection per thread, so reads run in parallel under WAL
+        self._tls = threading.local()
+        self._read_conns: List[sqlite3.Connection] = []
+        self._read_conns_lock = threading.Lock()
         
         if db_type == "sqlite":
             self._init_sqlite()
@@ -44,11 +149,43 @@ class Database:
         db_file = Path(self.db_path)
         db_file.parent.mkdir(parents=True, exist_ok=True)
         
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, cached_statements=SQLITE_CACHED_STATEMENTS
+        )
         self.conn.row_factory = sqlite3.Row
+        # WAL lets readers run alongside the writer, and NORMAL only syncs at
+        # checkpoints - enough for scraped data, and far fewer fsyncs per write
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        # 64 MiB page cache and up to 256 MiB memory-mapped reads
+        self.conn.execute("PRAGMA cache_size=-65536")
+        self.conn.execute("PRAGMA mmap_size=268435456")
         self._create_tables()
         logger.info(f"SQLite database initialized: {self.db_path}")
     
+    def _read_conn(self) -> sqlite3.Connection:
+        """This thread's read-only connection, opened on first use."""
+        conn = getattr(self._tls, "conn", None)
+        if conn is not None:
+            return conn
+        if self.db_path in ("", ":memory:") or "mode=memory" in self.db_path:
+            # Another connection would open a different (empty) database
+            return self.conn
+        
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, cached_statements=SQLITE_CACHED_STATEMENTS
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only=ON")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+        self._tls.conn = conn
+        with self._read_conns_lock:
+            self._read_conns.append(conn)
+        return conn
+    
     def _init_mongodb(self):
         """Initialize MongoDB connection."""
         try:
@@ -66,6 +203,9 @@ class Database:
             import psycopg2
             self.pg_conn = psycopg2.connect(self.db_path)
             self.pg_conn.autocommit = True
+            # Commits return without waiting for the WAL flush
+            with self.pg_conn.cursor() as cursor:
+                cursor.execute("SET synchronous_commit = off")
             logger.info("PostgreSQL connection initialized")
         except ImportError:
             logger.error("psycopg2 not installed. Install with: pip install psycopg2-binary")
@@ -75,6 +215,10 @@ class Database:
         """Create all required tables."""
         cursor = self.conn.cursor()
         
+        # Databases already at this version need none of the DDL below
+        if cursor.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        
         # Products table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS products (
@@ -102,6 +246,7 @@ class Database:
                 price REAL NOT NULL,
                 currency TEXT DEFAULT 'USD',
                 recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                recorded_at_ts INTEGER,
                 FOREIGN KEY (product_id) REFERENCES products(id)
             )
         """)
@@ -132,15 +277,94 @@ class Database:
             )
         """)
         
+        self._migrate_price_history(cursor)
+        self._create_price_stats(cursor)
+        
         # Create indexes
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_url ON products(url)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_history_product ON price_history(product_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_history_date ON price_history(recorded_at)")
+        # Covers the history queries, which are then answered from the index alone;
+        # id breaks ties within a second in insertion order, and the product_id
+        # prefix also serves the lookups the baseline indexes did
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_price_history_covering "
+            "ON price_history(product_id, recorded_at_ts DESC, id DESC, price, currency, recorded_at)"
+        )
+        for index in ("idx_price_history_product", "idx_price_history_date"):
+            cursor.execute(f"DROP INDEX IF EXISTS {index}")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_scrape_jobs_status ON scrape_jobs(status)")
         
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         self.conn.commit()
         logger.info("Database tables created successfully")
     
+    def _migrate_price_history(self, cursor: sqlite3.Cursor):
+        """Add and backfill recorded_at_ts on databases created before it existed."""
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(price_history)")}
+        if "recorded_at_ts" in columns:
+            return
+        
+        cursor.execute("ALTER TABLE price_history ADD COLUMN recorded_at_ts INTEGER")
+        cursor.execute(
+            "UPDATE price_history SET recorded_at_ts = CAST(strftime('%s', recorded_at) AS INTEGER)"
+        )
+        logger.info("Added recorded_at_ts to price_history")
+    
+    def _create_price_stats(self, cursor: sqlite3.Cursor):
+        """Create the per-product price aggregates, backfilled from existing history."""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'price_stats'")
+        if cursor.fetchone():
+            return
+        
+        cursor.execute("""
+            CREATE TABLE price_stats (
+                product_id INTEGER PRIMARY KEY,
+                min_price REAL NOT NULL,
+                max_price REAL NOT NULL,
+                sum_price REAL NOT NULL,
+                count INTEGER NOT NULL,
+                first_price REAL NOT NULL,
+                first_ts INTEGER,
+                last_price REAL NOT NULL,
+                last_ts INTEGER,
+                FOREIGN KEY (product_id) REFERENCES products(id)
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO price_stats
+            (product_id, min_price, max_price, sum_price, count, first_price, first_ts, last_price, last_ts)
+            SELECT
+                product_id, MIN(price), MAX(price), SUM(price), COUNT(*),
+                (SELECT price FROM price_history AS f WHERE f.product_id = h.product_id
+                 ORDER BY recorded_at_ts, id LIMIT 1),
+                MIN(recorded_at_ts),
+                (SELECT price FROM price_history AS l WHERE l.product_id = h.product_id
+                 ORDER BY recorded_at_ts DESC, id DESC LIMIT 1),
+                MAX(recorded_at_ts)
+            FROM price_history AS h
+            GROUP BY product_id
+        """)
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group several writes into a single commit.
+        Nested blocks (including every write method) join the outermost
+        one; everything is rolled back if the block raises. Holds the write
+        lock, so concurrent writers take turns instead of interleaving.
+        The get_* methods read on separate connections and only see the
+        writes once the block commits.
+        """
+        with self._write_lock:
+            self._transaction_depth += 1
+            try:
+                if self._transaction_depth == 1:
+                    with self.conn:
+                        yield self.conn
+                else:
+                    yield self.conn
+            finally:
+                self._transaction_depth -= 1
+    
     def insert_product(self, product_data: Dict[str, Any]) -> int:
         """
         Insert or update a product.
@@ -151,58 +375,52 @@ class Database:
         Returns:
             Product ID
         """
-        cursor = self.conn.cursor()
+        # One statement whether or not the URL is already stored
+        row = _product_row(product_data)
+        with self.transaction():
+            if _HAS_RETURNING:
+                cursor = self.conn.execute(_PRODUCT_UPSERT_RETURNING_SQL, row)
+                product_id = cursor.fetchone()[0]
+            else:
+                self.conn.execute(_PRODUCT_UPSERT_SQL, row)
+                product_id = self.conn.execute(
+                    "SELECT id FROM products WHERE url = ?", (row[0],)
+                ).fetchone()[0]
         
-        # Check if product exists
-        cursor.execute("SELECT id FROM products WHERE url = ?", (product_data.get("url"),))
-        existing = cursor.fetchone()
-        
-        metadata = json.dumps(product_data.get("metadata", {}))
-        
-        if existing:
-            # Update existing product
-            cursor.execute("""
-                UPDATE products 
-                SET title = ?, price = ?, brand = ?, rating = ?, 
-                    availability = ?, description = ?, image_url = ?, 
-                    source = ?, metadata = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (
-                product_data.get("title"),
-                product_data.get("price"),
-                product_data.get("brand"),
-                product_data.get("rating"),
-                product_data.get("availability", False),
-                product_data.get("description"),
-                product_data.get("image_url"),
-                product_data.get("source"),
-                metadata,
-                existing[0]
-            ))
-            product_id = existing[0]
-        else:
-            # Insert new product
-            cursor.execute("""
-                INSERT INTO products 
-                (url, title, price, brand, rating, availability, description, image_url, source, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                product_data.get("url"),
-                product_data.get("title"),
-                product_data.get("price"),
-                product_data.get("brand"),
-                product_data.get("rating"),
-                product_data.get("availability", False),
-                product_data.get("description"),
-                product_data.get("image_url"),
-                product_data.get("source"),
-                metadata
-            ))
-            product_id = cursor.lastrowid
-        
-        self.conn.commit()
         return product_id
     
+    def insert_products_bulk(self, products: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert or update many products in one transaction.
+        
+        Args:
+            products: List of product data dicts
+            
+        Returns:
+            Product IDs, in input order
+        """
+        if not products:
+            return []
+        
+        rows = [_product_row(product_data) for product_data in products]
+        
+        product_ids = {}
+        with self.transaction():
+            for start in range(0, len(rows), BULK_BATCH_SIZE):
+                self.conn.executemany(_PRODUCT_UPSERT_SQL, rows[start:start + BULK_BATCH_SIZE])
+            
+            # Upserts give no reliable lastrowid, so look the IDs up by URL
+            urls = list(dict.fromkeys(row[0] for row in rows))
+            for start in range(0, len(urls), _IN_CLAUSE_SIZE):
+                batch = urls[start:start + _IN_CLAUSE_SIZE]
+                placeholders = ", ".join("?" for _ in batch)
+                for url, product_id in self.conn.execute(
+                    f"SELECT url, id FROM products WHERE url IN ({placeholders})", batch
+                ):
+                    product_ids[url] = product_id
+        
+        return [product_ids[row[0]] for row in rows]
+    
     def add_price_history(self, product_id: int, price: float, currency: str = "USD"):
         """
         Add price history entry.
@@ -212,41 +430,272 @@ class Database:
             price: Price value
             currency: Currency code
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO price_history (product_id, price, currency)
-            VALUES (?, ?, ?)
-        """, (product_id, price, currency))
-        self.conn.commit()
+        with self.transaction():
+            self.conn.execute(_PRICE_HISTORY_INSERT_SQL, (product_id, price, currency))
+            self.conn.execute(_PRICE_STATS_UPSERT_SQL, (product_id, price))
+    
+    def add_price_history_bulk(self, entries: List[Tuple[int, float, str]]):
+        """
+        Add many price history entries in one transaction.
+        
+        Args:
+            entries: (product_id, price, currency) tuples
+        """
+        with self.transaction():
+            for start in range(0, len(entries), BULK_BATCH_SIZE):
+                batch = entries[start:start + BULK_BATCH_SIZE]
+                self.conn.executemany(_PRICE_HISTORY_INSERT_SQL, batch)
+                self.conn.executemany(
+                    _PRICE_STATS_UPSERT_SQL, [(product_id, price) for product_id, price, _ in batch]
+                )
     
-    def get_price_history(self, product_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+    def get_price_history(
+        self,
+        product_id: int,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        order: str = "desc"
+    ) -> List[Dict[str, Any]]:
         """
         Get price history for a product.
         
         Args:
             product_id: Product ID
-            limit: Maximum number of records
+            limit: Maximum number of records (always the most recent ones)
+            since: Only records at or after this time (naive values are taken as UTC,
+                like CURRENT_TIMESTAMP)
+            order: "desc" for newest first, "asc" for oldest first
             
         Returns:
             List of price history records
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT price, currency, recorded_at
-            FROM price_history
-            WHERE product_id = ?
-            ORDER BY recorded_at DESC
-            LIMIT ?
-        """, (product_id, limit))
-        
-        return [
-            {
+        return list(self.iter_price_history(product_id, limit, since, order))
+    
+    def iter_price_history(
+        self,
+        product_id: int,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        order: str = "desc"
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream price history records as the cursor reads them.
+        Takes the same arguments as get_price_history.
+        """
+        query, params = self._price_history_query(
+            ("price", "currency", "recorded_at"), product_id, limit, since, order
+        )
+        for row in self._read_conn().execute(query, params):
+            yield {
                 "price": row[0],
                 "currency": row[1],
                 "recorded_at": row[2]
             }
-            for row in cursor.fetchall()
-        ]
+    
+    def get_price_history_arrays(
+        self,
+        product_id: int,
+        limit: int = 100,
+        since: Optional[datetime] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get price history as parallel arrays, oldest first.
+        
+        Args:
+            product_id: Product ID
+            limit: Maximum number of records (the most recent ones)
+            since: Only records at or after this time (see get_price_history)
+            
+        Returns:
+            (timestamps_ns int64 array of UTC epoch nanoseconds, prices float64 array)
+        """
+        query, params = self._price_history_query(
+            ("recorded_at_ts * 1000000000 AS recorded_ns", "price"), product_id, limit, since, "asc"
+        )
+        cursor = self._read_conn().cursor()
+        # Plain tuples; np.fromiter cannot unpack sqlite3.Row
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        
+        rows = np.fromiter(cursor, dtype=[("recorded_ns", np.int64), ("price", np.float64)])
+        return rows["recorded_ns"].copy(), rows["price"].copy()
+    
+    def _price_history_query(
+        self,
+        columns: Tuple[str, ...],
+        product_id: int,
+        limit: int,
+        since: Optional[datetime],
+        order: str
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the newest-`limit` price history query and its parameters.
+        Rows recorded in the same second keep insertion (id) order.
+        """
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Invalid order: {order}")
+        
+        where = "product_id = ?"
+        params: List[Any] = [product_id]
+        if since is not None:
+            # Integer comparison on the (product_id, recorded_at_ts) index
+            where += " AND recorded_at_ts >= ?"
+            params.append(_since_ts(since))
+        params.append(limit)
+        
+        if order == "desc":
+            select = ", ".join(columns)
+        else:
+            # The sort keys ride along so the outer query can reverse the order
+            select = ", ".join(columns + ("recorded_at_ts AS sort_ts", "id AS sort_id"))
+        
+        query = f"""
+            SELECT {select}
+            FROM price_history
+            WHERE {where}
+            ORDER BY recorded_at_ts DESC, id DESC
+            LIMIT ?
+        """
+        if order == "asc":
+            # Keep the most recent rows, then return them oldest first
+            names = ", ".join(column.rsplit(" AS ", 1)[-1] for column in columns)
+            query = f"SELECT {names} FROM ({query}) ORDER BY sort_ts ASC, sort_id ASC"
+        
+        return query, params
+    
+    def get_price_stats(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the running price aggregates for a product's whole history.
+        
+        Args:
+            product_id: Product ID
+            
+        Returns:
+            Dict with min/max/sum/count and first/last price and time, or None
+        """
+        row = self._read_conn().execute(
+            "SELECT * FROM price_stats WHERE product_id = ?", (product_id,)
+        ).fetchone()
+        return dict(row) if row else None
+    
+    def get_latest_prices(
+        self,
+        product_id: int,
+        n: int = 2,
+        since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the most recent prices for a product, newest first.
+        
+        Args:
+            product_id: Product ID
+            n: Number of records
+            since: Only records at or after this time (see get_price_history)
+            
+        Returns:
+            Up to n price history records
+        """
+        # An index seek on (product_id, recorded_at_ts DESC, ...) that stops after n rows
+        return self.get_price_history(product_id, limit=n, since=since)
+    
+    def get_latest_two_prices_all(
+        self,
+        since: Optional[datetime] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the two newest prices of every product in one query.
+        
+        Args:
+            since: Only records at or after this time (see get_price_history)
+            
+        Returns:
+            (product_ids int64, current float64, previous float64) aligned arrays,
+            sorted by product ID, for products with at least two records
+        """
+        where = ""
+        params: List[Any] = []
+        if since is not None:
+            where = "WHERE recorded_at_ts >= ?"
+            params.append(_since_ts(since))
+        
+        cursor = self._read_conn().cursor()
+        # Plain tuples; np.fromiter cannot unpack sqlite3.Row
+        cursor.row_factory = None
+        cursor.execute(f"""
+            SELECT
+                product_id,
+                MAX(CASE WHEN rn = 1 THEN price END),
+                MAX(CASE WHEN rn = 2 THEN price END)
+            FROM (
+                SELECT product_id, price, ROW_NUMBER() OVER (
+                    PARTITION BY product_id ORDER BY recorded_at_ts DESC, id DESC
+                ) AS rn
+                FROM price_history
+                {where}
+            )
+            WHERE rn <= 2
+            GROUP BY product_id
+            HAVING COUNT(*) = 2
+            ORDER BY product_id
+        """, params)
+        
+        rows = np.fromiter(
+            cursor, dtype=[("product_id", np.int64), ("current", np.float64), ("previous", np.float64)]
+        )
+        return rows["product_id"].copy(), rows["current"].copy(), rows["previous"].copy()
+    
+    def get_price_matrix(
+        self,
+        product_ids: List[int],
+        limit: int = 100,
+        since: Optional[datetime] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the price history of many products as parallel arrays.
+        One row per record, grouped by product ID and oldest first within
+        each product, so per-product slices are contiguous.
+        
+        Args:
+            product_ids: Product IDs
+            limit: Maximum records per product (the most recent ones)
+            since: Only records at or after this time (see get_price_history)
+            
+        Returns:
+            (product_ids int64, timestamps_ns int64 UTC epoch nanoseconds,
+            prices float64) arrays
+        """
+        dtype = [("product_id", np.int64), ("recorded_ns", np.int64), ("price", np.float64)]
+        where = ""
+        cutoff: List[Any] = []
+        if since is not None:
+            where = "AND recorded_at_ts >= ?"
+            cutoff.append(_since_ts(since))
+        
+        # Sorted IDs keep the batches, and so the concatenated rows, in product order
+        ids = sorted(set(product_ids))
+        cursor = self._read_conn().cursor()
+        # Plain tuples; np.fromiter cannot unpack sqlite3.Row
+        cursor.row_factory = None
+        chunks = []
+        for start in range(0, len(ids), _IN_CLAUSE_SIZE):
+            batch = ids[start:start + _IN_CLAUSE_SIZE]
+            placeholders = ", ".join("?" for _ in batch)
+            cursor.execute(f"""
+                SELECT product_id, recorded_at_ts * 1000000000, price
+                FROM (
+                    SELECT product_id, recorded_at_ts, price, id, ROW_NUMBER() OVER (
+                        PARTITION BY product_id ORDER BY recorded_at_ts DESC, id DESC
+                    ) AS rn
+                    FROM price_history
+                    WHERE product_id IN ({placeholders}) {where}
+                )
+                WHERE rn <= ?
+                ORDER BY product_id, recorded_at_ts, id
+            """, batch + cutoff + [limit])
+            chunks.append(np.fromiter(cursor, dtype=dtype))
+        
+        rows = np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+        return rows["product_id"].copy(), rows["recorded_ns"].copy(), rows["price"].copy()
     
     def create_scrape_job(self, url: str, method: str = "auto") -> int:
         """
@@ -259,12 +708,8 @@ class Database:
         Returns:
             Job ID
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO scrape_jobs (url, status, method, started_at)
-            VALUES (?, 'pending', ?, CURRENT_TIMESTAMP)
-        """, (url, method))
-        self.conn.commit()
+        with self.transaction():
+            cursor = self.conn.execute(_SCRAPE_JOB_INSERT_SQL, (url, method))
         return cursor.lastrowid
     
     def update_scrape_job(self, job_id: int, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
@@ -277,21 +722,14 @@ class Database:
             result: Result data
             error: Error message
         """
-        cursor = self.conn.cursor()
-        result_json = json.dumps(result) if result else None
+        result_json = _dumps_json(result) if result else None
         
-        cursor.execute("""
-            UPDATE scrape_jobs
-            SET status = ?, result = ?, error = ?, completed_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (status, result_json, error, job_id))
-        self.conn.commit()
+        with self.transaction():
+            self.conn.execute(_SCRAPE_JOB_UPDATE_SQL, (status, result_json, error, job_id))
     
     def get_product_by_url(self, url: str) -> Optional[Dict[str, Any]]:
         """Get product by URL."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM products WHERE url = ?", (url,))
-        row = cursor.fetchone()
+        row = self._read_conn().execute(_PRODUCT_BY_URL_SQL, (url,)).fetchone()
         
         if row:
             return dict(row)
@@ -299,13 +737,32 @@ class Database:
     
     def get_all_products(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get all products."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM products ORDER BY updated_at DESC LIMIT ?", (limit,))
-        return [dict(row) for row in cursor.fetchall()]
+        return list(self.iter_all_products(limit))
+    
+    def iter_all_products(self, limit: int = 100) -> Iterator[Dict[str, Any]]:
+        """Stream products, most recently updated first, without building a list."""
+        cursor = self._read_conn().execute(
+            "SELECT * FROM products ORDER BY updated_at DESC LIMIT ?", (limit,)
+        )
+        for row in cursor:
+            yield dict(row)
     
     def close(self):
-        """Close database connection."""
+        """Close database connections."""
+        with self._read_conns_lock:
+            for conn in self._read_conns:
+                conn.close()
+            self._read_conns.clear()
         if self.conn:
-            self.conn.close()
+            with self._write_lock:
+                try:
+                    # Refresh planner statistics for recently changed indexes (bounded
+                    # by analysis_limit) and truncate the WAL file on the way out
+                    self.conn.execute("PRAGMA analysis_limit=1000")
+                    self.conn.execute("PRAGMA optimize")
+                    self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error as e:
+                    logger.warning(f"SQLite optimize on close failed: {e}")
+                self.conn.close()
             logger.info("Database connection closed")
 
@@ -3,23 +3,20 @@ Price history model.
 """
 
 from typing import Optional
+from dataclasses import dataclass
 from datetime import datetime
 
 
+@dataclass(slots=True)
 class PriceHistory:
     """Price history entry model."""
+    product_id: int
+    price: float
+    currency: str = "USD"
+    recorded_at: Optional[datetime] = None
     
-    def __init__(
-        self,
-        product_id: int,
-        price: float,
-        currency: str = "USD",
-        recorded_at: Optional[datetime] = None
-    ):
-        self.product_id = product_id
-        self.price = price
-        self.currency = currency
-        self.recorded_at = recorded_at or datetime.now()
+    def __post_init__(self):
+        self.recorded_at = self.recorded_at or datetime.now()
     
     def to_dict(self) -> dict:
         """Convert to dictionary."""
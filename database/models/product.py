@@ -3,35 +3,26 @@ Product model for database operations.
 """
 
 from typing import Dict, Optional, Any
+from dataclasses import dataclass
 from datetime import datetime
 
 
+@dataclass(slots=True)
 class Product:
     """Product data model."""
+    url: str
+    title: Optional[str] = None
+    price: Optional[float] = None
+    brand: Optional[str] = None
+    rating: Optional[float] = None
+    availability: bool = False
+    description: Optional[str] = None
+    image_url: Optional[str] = None
+    source: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
     
-    def __init__(
-        self,
-        url: str,
-        title: Optional[str] = None,
-        price: Optional[float] = None,
-        brand: Optional[str] = None,
-        rating: Optional[float] = None,
-        availability: bool = False,
-        description: Optional[str] = None,
-        image_url: Optional[str] = None,
-        source: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
-    ):
-        self.url = url
-        self.title = title
-        self.price = price
-        self.brand = brand
-        self.rating = rating
-        self.availability = availability
-        self.description = description
-        self.image_url = image_url
-        self.source = source
-        self.metadata = metadata or {}
+    def __post_init__(self):
+        self.metadata = self.metadata or {}
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
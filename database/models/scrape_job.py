@@ -3,6 +3,7 @@ Scrape job model.
 """
 
 from typing import Optional, Dict, Any
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 
@@ -16,26 +17,16 @@ class JobStatus(Enum):
     CANCELLED = "cancelled"
 
 
+@dataclass(slots=True)
 class ScrapeJob:
     """Scrape job model."""
-    
-    def __init__(
-        self,
-        url: str,
-        method: str = "auto",
-        status: str = "pending",
-        result: Optional[Dict[str, Any]] = None,
-        error: Optional[str] = None,
-        started_at: Optional[datetime] = None,
-        completed_at: Optional[datetime] = None
-    ):
-        self.url = url
-        self.method = method
-        self.status = status
-        self.result = result
-        self.error = error
-        self.started_at = started_at
-        self.completed_at = completed_at
+    url: str
+    method: str = "auto"
+    status: str = "pending"
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
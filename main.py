@@ -8,6 +8,17 @@ from scrape import (
 )
 from parse import parse_with_ollama
 
+
+@st.cache_data(ttl=600, max_entries=64, show_spinner=False)
+def cached_scrape(url):
+    return scrape_website(url)
+
+
+@st.cache_data(ttl=600, max_entries=64, show_spinner=False)
+def cached_clean(body_content):
+    return clean_body_content(body_content)
+
+
 st.set_page_config(
     page_title="AI Web Scraper",
     layout="wide",
@@ -49,6 +60,8 @@ with col2:
 
 if clear_btn:
     st.session_state.clear()
+    cached_scrape.clear()
+    cached_clean.clear()
     st.rerun()
 
 if scrape_btn:
@@ -62,14 +75,14 @@ if scrape_btn:
                 progress = st.progress(0, text="Initializing...")
 
                 progress.progress(30, text="Fetching website...")
-                result = scrape_website(url)
+                result = cached_scrape(url)
 
                 progress.progress(60, text="Extracting body content...")
                 body_content = extract_body_content(result)
                 st.session_state.raw_content = body_content 
 
                 progress.progress(90, text="Cleaning content...")
-                cleaned_content = clean_body_content(body_content)
+                cleaned_content = cached_clean(body_content)
                 st.session_state.dom_content = cleaned_content 
                 
                 progress.progress(100, text="Done!")
@@ -1,17 +1,57 @@
 import selenium.webdriver as webdriver
 from selenium.webdriver.edge.service import Service
+from selenium.common.exceptions import WebDriverException
 # from selenium.webdriver.chrome.service import Service
+import atexit
+import queue
+from concurrent.futures import ThreadPoolExecutor
 import time
-from bs4 import BeautifulSoup
+import requests
+from lxml import etree
 
-def scrape_website(website):
-    print("Launching your Browser...")
+# Text outside scripts and styles, selected by libxml2 without a Python DOM
+_BODY_TEXT_XPATH = etree.XPath("//body//text()[not(ancestor::script or ancestor::style)]")
+# Idle browser drivers kept for the next scrape_website call
+_DRIVER_POOL_SIZE = 4
+_driver_pool = queue.LifoQueue(maxsize=_DRIVER_POOL_SIZE)
 
-    msedge_drive_path = "drivers\msedgedriver.exe"
-    options = webdriver.EdgeOptions()
-    driver = webdriver.Edge(service=Service(msedge_drive_path), options=options)
+# Server-rendered pages are fetched over plain HTTP. The raw HTML must carry
+# product markup (schema.org microdata or JSON-LD) and this much visible text;
+# consent, bot-check and JS shell pages reach the length with nav text alone
+_STATIC_MIN_TEXT = 500
+_PRODUCT_SIGNAL_XPATH = etree.XPath(
+    "boolean(//*[contains(@itemtype, 'schema.org/Product')]"
+    " | //script[@type='application/ld+json'][contains(., 'Product')])"
+)
+# (connect, read) seconds, so unreachable hosts fall back to the browser quickly
+_HTTP_TIMEOUT = (3, 10)
+_HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+_http_session = requests.Session()
+
+
+def scrape_website(website, force_browser=False):
+    if not force_browser:
+        html = _fetch_static(website)
+        if html is not None:
+            print("Website page fetched without a browser.")
+            return html
 
+    # Browser startup takes seconds, so drivers are reused across calls
+    driver = _pooled_driver()
+    if driver is not None:
+        print("Reusing your Browser...")
+    else:
+        print("Launching your Browser...")
+        driver = _new_driver()
 
+    reusable = False
     try:
         driver.get(website)
         print("Website page Loading:", driver.title)
@@ -19,36 +59,123 @@ def scrape_website(website):
         print("Website page loaded successfully.")
         # time.sleep(5)
 
+        reusable = True
         return html
     finally:
+        _release_driver(driver, reusable)
+
+
+def scrape_websites(websites, max_workers=_DRIVER_POOL_SIZE, force_browser=False):
+    # Pages load in parallel; one worker per pooled driver keeps browsers reused
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda website: scrape_website(website, force_browser), websites))
+
+
+def _fetch_static(website):
+    try:
+        response = _http_session.get(
+            website, headers=_HTTP_HEADERS, timeout=_HTTP_TIMEOUT, allow_redirects=True
+        )
+        response.raise_for_status()
+    except requests.RequestException:
+        return None
+
+    html = response.text
+    tree = _parse_html(html)
+    if tree is None or not _PRODUCT_SIGNAL_XPATH(tree):
+        return None
+    visible_text = sum(len(s.strip()) for s in _BODY_TEXT_XPATH(tree))
+    return html if visible_text >= _STATIC_MIN_TEXT else None
+
+
+def _new_driver():
+    msedge_drive_path = "drivers\msedgedriver.exe"
+    options = webdriver.EdgeOptions()
+    return webdriver.Edge(service=Service(msedge_drive_path), options=options)
+
+
+def _pooled_driver():
+    # Pooled windows can be closed by the user or lose their session while idle
+    while True:
+        try:
+            driver = _driver_pool.get_nowait()
+        except queue.Empty:
+            return None
+        try:
+            driver.current_url
+            return driver
+        except WebDriverException:
+            _quit_driver(driver)
+
+
+def _quit_driver(driver):
+    try:
         driver.quit()
-        print("Browser closed.")
+    except WebDriverException:
+        pass
+
+
+def _release_driver(driver, reusable):
+    if reusable:
+        try:
+            # Do not carry this site's session into the next scrape
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+            _driver_pool.put_nowait(driver)
+            return
+        except Exception:
+            pass
+    _quit_driver(driver)
+    print("Browser closed.")
+
+
+def _close_pooled_clients():
+    _http_session.close()
+    while True:
+        try:
+            driver = _driver_pool.get_nowait()
+        except queue.Empty:
+            return
+        _quit_driver(driver)
+
+
+atexit.register(_close_pooled_clients)
 
 
 
 def extract_body_content(html_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
-    body_content = soup.body
-    if body_content:
-        return str(body_content)
+    tree = _parse_html(html_content)
+    body_content = tree.find("body") if tree is not None else None
+    if body_content is not None:
+        return etree.tostring(body_content, method="html", encoding="unicode", with_tail=False)
     return ""
     
 
 
 def clean_body_content(body_content):
-    soup = BeautifulSoup(body_content, 'html.parser')
-
-    for script_or_style in soup(['script', 'style']):
-        script_or_style.decompose()
+    tree = _parse_html(body_content)
+    if tree is None:
+        return ""
 
-    cleaned_content = soup.get_text(separator='\n', strip=True)
-    cleaned_content = "\n".join(
-        line.strip() for line in cleaned_content.splitlines() if line.strip()
-    )
+    # Each line is stripped once, with the whole loop running in C
+    strings = filter(None, map(str.strip, _BODY_TEXT_XPATH(tree)))
+    cleaned_content = "\n".join(strings)
+    cleaned_content = "\n".join(filter(None, map(str.strip, cleaned_content.splitlines())))
 
     return cleaned_content
 
 
+def _parse_html(html):
+    # libxml2 builds the tree in C; far cheaper than a BeautifulSoup object graph
+    if not html:
+        return None
+    try:
+        return etree.HTML(html)
+    except ValueError:
+        # Strings with an XML encoding declaration must be parsed as bytes
+        return etree.HTML(html.encode("utf-8"))
+
+
 def split_dom_content(dom_content, max_length=6000):
     return [
         dom_content[ i : i+max_length] for i in range(0, len(dom_content), max_length)